@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+
+import pipeline
+from layout import Layout
+from store import write_json
+from templates import document
+from versions import changed_fields, field_versions
+
+# --- Text archive for re-extraction ---
+# Each extracted document's decoded text (and positioned layout fragments) is
+# kept with its record and the version of the rule behind every value (see
+# versions.py). When rules change, `reextract` re-runs just the changed fields
+# over the archived text -- no PDF is opened again and unchanged fields are
+# not recomputed. One JSON file per document, keyed by file name and text,
+# written atomically, so an archive can be shared by worker processes.
+
+
+class Archive:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def add(self, file_name, insurer, text, layout, record):
+        """Archives one extraction; `record` is the insurer module's record."""
+        key = hashlib.sha256(f"{file_name}\0{text}".encode("utf-8")).hexdigest()[:24]
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        current = field_versions(insurer)
+        write_json(path, {
+            "file": file_name,
+            "insurer": insurer,
+            "text": text,
+            "layout": layout.dump() if layout is not None else None,
+            "record": record,
+            "versions": {field: current[field] for field in record if field in current},
+        })
+
+    def paths(self):
+        for root, dirs, names in os.walk(self.directory):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def reextract(self, dry_run=False):
+        """
+        Re-runs the fields whose rules changed, in every archived document.
+        Yields (insurer, record, changed fields) per document, updated in place
+        unless `dry_run`.
+        """
+        for path in self.paths():
+            entry = self.load(path)
+            insurer = entry["insurer"]
+            changed = changed_fields(insurer, entry["versions"])
+            if changed and not dry_run:
+                module = pipeline.load_extractor(insurer)
+                layout = Layout.load(entry["layout"]) if entry["layout"] is not None else None
+                with document(pipeline.INSURERS[insurer]):
+                    values = module.extract_policy_details(entry["text"], entry["file"], layout, changed)
+                entry["record"].update(values)
+                current = field_versions(insurer)
+                entry["versions"].update({field: current[field] for field in changed})
+                write_json(path, entry)
+            yield insurer, entry["record"], changed
@@ -0,0 +1,46 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+# --- Import-time benchmark ---
+# Each module is imported in a fresh interpreter (as a worker or CLI process
+# would) and timed; the heavy third-party packages it pulled in are listed.
+MODULES = ["pipeline", "tata", "royal", "reliance", "kotak", "national", "preflight", "cli", "export", "register"]
+HEAVY = ["streamlit", "pandas", "PyPDF2", "xlsxwriter", "openpyxl", "numpy"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_import(module, runs):
+    times, loaded = [], ""
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        times.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ""
+    return statistics.median(times), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cold imports of the app's modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("-n", "--runs", type=int, default=5, help="fresh interpreters per module (median is reported)")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<12} {'median ms':>10}  heavy imports")
+    for module in args.modules:
+        seconds, loaded = time_import(module, args.runs)
+        print(f"{module:<12} {seconds * 1000:>10.1f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
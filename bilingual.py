@@ -0,0 +1,67 @@
+import re
+import unicodedata
+
+# --- Pre-normalized text layer for bilingual (Hindi/English) schedules ---
+# PyPDF2 often returns Devanagari with a space before every vowel sign or
+# after a virama, zero-width joiners, and private-use glyphs from embedded
+# fonts. Normalizing once per document lets labels like "कुल राशि" be matched
+# literally instead of with a `\s*` between every combining character.
+_GARBAGE_RE = re.compile(
+    "[\u200b-\u200f\u2060\ufeff\u00ad"    # zero-width characters, soft hyphen
+    "\ue000-\uf8ff\ufffd"                   # private-use glyphs, replacement char
+    "\x00-\x08\x0b\x0c\x0e-\x1f]"           # control characters
+)
+
+# Dependent vowel signs, nukta, virama, candrabindu/anusvara/visarga, accents
+_MARKS = "\u0900-\u0903\u093a-\u094f\u0951-\u0957\u0962\u0963"
+_CONSONANTS = "\u0915-\u0939\u0958-\u095f"
+_SPLIT_CLUSTER_RE = re.compile(
+    f"(?<=[\u0900-\u097f])\\s+(?=[{_MARKS}])"   # "क ु" -> "कु"
+    f"|(?<=\u094d)\\s+(?=[{_CONSONANTS}])"       # "स् त" -> "स्त"
+)
+_DEVANAGARI_RE = re.compile("[\u0900-\u097f]")
+
+
+def normalize(text):
+    """
+    Returns `text` in NFC with zero-width/garbage characters removed, all
+    whitespace collapsed to single spaces and split Devanagari clusters joined.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = " ".join(_GARBAGE_RE.sub("", text).split())
+    if _DEVANAGARI_RE.search(text):
+        text = _SPLIT_CLUSTER_RE.sub("", text)
+    return text
+
+
+class LabelIndex:
+    """
+    Positions of known labels in a normalized text, found in a single pass.
+
+    `labels` maps a key to a regex fragment for that label (all bilingual
+    variants of one label belong in the same fragment). List longer bilingual
+    labels before English-only ones that they contain.
+    """
+
+    def __init__(self, text, labels, flags=re.IGNORECASE):
+        self.text = text
+        self.flags = flags
+        self.positions = {key: [] for key in labels}
+        names = list(labels)
+        combined = re.compile(
+            "|".join(f"(?P<l{i}>{labels[key]})" for i, key in enumerate(names)), flags
+        )
+        for match in combined.finditer(text):
+            self.positions[names[int(match.lastgroup[1:])]].append(match.end())
+
+    def value_after(self, key, pattern, default="N/A"):
+        """
+        Returns the first group of `pattern` matched directly after an
+        occurrence of the label `key` (in document order), or `default`.
+        """
+        compiled = re.compile(pattern, self.flags)
+        for end in self.positions.get(key, ()):
+            match = compiled.match(self.text, end)
+            if match:
+                return match.group(1).strip()
+        return default
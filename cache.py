@@ -0,0 +1,115 @@
+import copy
+import hashlib
+import importlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# --- Shared extraction cache ---
+# One cache per server process, shared by every Streamlit session (sessions
+# are threads of the same process). Results are keyed by the file's content
+# hash, the extractor and a hash of the extractor's source, so editing an
+# extractor invalidates its entries. The least recently used entries are
+# evicted once the estimated size passes MAX_BYTES.
+MAX_BYTES = int(os.environ.get("EXTRACTOR_CACHE_MB", "128")) * 1024 * 1024
+
+# Modules whose code shapes every extractor's output
+SHARED_MODULES = ("pattern_stats", "templates", "layout", "bilingual")
+
+
+def _size(value):
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(k) + _size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def extractor_version(*modules):
+    """Short hash of the source of `modules` and the shared extraction modules."""
+    hasher = hashlib.sha1()
+    for name in modules + SHARED_MODULES:
+        path = importlib.import_module(name).__file__
+        stamp = (path, os.path.getmtime(path))
+        with _versions_lock:
+            digest = _versions.get(stamp)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            with _versions_lock:
+                _versions[stamp] = digest
+        hasher.update(digest.encode())
+    return hasher.hexdigest()[:12]
+
+
+class ExtractionCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.Lock()
+
+    def key(self, digest, modules, fields=None):
+        """
+        `modules` names the extractor module(s) that produced the result and
+        `fields` the field subset it was extracted with (None for all).
+        """
+        modules = (modules,) if isinstance(modules, str) else tuple(modules)
+        return (digest, modules, extractor_version(*modules), None if fields is None else tuple(fields))
+
+    def get(self, digest, modules, fields=None):
+        """Returns a copy of the cached result, or None."""
+        key = self.key(digest, modules, fields)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def put(self, digest, modules, value, fields=None):
+        key = self.key(digest, modules, fields)
+        value = copy.deepcopy(value)
+        size = _size(key) + _size(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries), "bytes": self.size, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+            }
+
+    def summary(self):
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+        return (f"{stats['entries']} cached result(s), {stats['bytes'] / 1024:.0f} KiB; "
+                f"{stats['hits']} hit(s), {stats['misses']} miss(es) ({rate} hit rate)")
+
+
+EXTRACTIONS = ExtractionCache()
@@ -0,0 +1,323 @@
+import argparse
+import os
+import sys
+
+import pipeline
+from dedupe import DuplicateIndex, batch_id, content_hash, policy_key
+from pattern_stats import save_stats
+
+
+# --- Input files ---
+def iter_pdfs(paths):
+    """Yields PDF paths from files and (recursively) directories, in sorted order."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def hash_files(paths):
+    """Returns ([(path, digest), ...], skipped) with byte-identical copies dropped."""
+    unique, skipped, seen = [], [], set()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest = content_hash(f.read())
+        if digest in seen:
+            skipped.append(path)
+            continue
+        seen.add(digest)
+        unique.append((path, digest))
+    return unique, skipped
+
+
+# --- Extraction ---
+REPORT_BUCKETS = ["Skipped identical", "Rejected", "Needs OCR", "Unrecognized", "Failed"]
+
+
+def new_report(skipped=()):
+    report = {label: [] for label in REPORT_BUCKETS}
+    report["Skipped identical"].extend(skipped)
+    return report
+
+
+def extract_path(path, insurer=None, fields=None, source=None, archive=None):
+    """
+    Triages and extracts one PDF (only `fields`, combined-register names,
+    when given), read from `source` instead of `path` when given (a binary
+    file object), keeping its text in `archive` if given.
+    Returns (status, reason, insurer, record);
+    insurer and record are None unless the status is preflight.OK, otherwise
+    the status names the report bucket.
+    """
+    import preflight
+
+    triage = preflight.check(path if source is None else source)
+    if not triage.ok:
+        return triage.status, triage.reason, None, None
+    try:
+        found, data = pipeline.extract_file(triage.reader, os.path.basename(path), insurer, fields, archive)
+    except Exception as e:
+        return "Failed", str(e), None, None
+    if found is None:
+        return "Unrecognized", "", None, None
+    return preflight.OK, "", found, data
+
+
+def register_results(outcomes, batch, report):
+    """
+    Takes (path, digest, status, reason, insurer, record) outcomes in register
+    order and yields (insurer, record, combined row) for extracted ones, with
+    duplicates flagged; the rest are noted in `report`. Learned state and the
+    duplicate index are saved once the outcomes are exhausted.
+    """
+    duplicates = DuplicateIndex()
+    for path, digest, status, reason, found, data in outcomes:
+        if found is None:
+            if status == "Failed":
+                print(f"Failed to process file {path}: {reason}", file=sys.stderr)
+                reason = ""
+            report[status].append(f"{path} ({reason})" if reason else path)
+            continue
+        data["Duplicate Of"] = duplicates.register(data, os.path.basename(path), digest, batch)
+        yield found, data, pipeline.canonical(data, found)
+
+    duplicates.save()
+    save_stats()
+
+
+def extract_all(files, insurer, report, fields=None, jobs=1, archive=None):
+    """
+    Extracts each (path, digest) in order; see register_results. With `jobs`
+    > 1, reading, extraction and the consumer run as concurrent stages.
+    """
+    if jobs > 1:
+        from stages import staged_outcomes
+
+        outcomes = staged_outcomes(files, insurer, fields, jobs, archive=archive)
+    else:
+        outcomes = ((path, digest) + extract_path(path, insurer, fields, archive=archive) for path, digest in files)
+    return register_results(outcomes, batch_id(digest for _, digest in files), report)
+
+
+# --- Output ---
+def append_to_register(path, rows, out):
+    """
+    Appends new/changed rows to a CSV register in place; for an .xlsx
+    register they are written to a separate additions workbook.
+    """
+    import register
+
+    index = register.load_index(path, path)
+    new, changed = register.new_or_changed(list(rows), index)
+    if register.is_csv(path):
+        register.append_csv(path, new + changed)
+        print(f"Appended {len(new)} new and {len(changed)} changed rows to {path}")
+    else:
+        out = out or "register_additions.xlsx"
+        register.write_additions(out, new + changed, register.read_header(path, path))
+        print(f"Wrote {len(new)} new and {len(changed)} changed rows to {out} (append them to {path})")
+
+
+def write_register(results, out=None, append=None, fields=None):
+    """
+    Writes (insurer, record, row) results to a new workbook (with only the
+    extracted `fields` when given), or appends them to `append`.
+    """
+    # PDF, pandas and xlsxwriter modules are imported by the stage that uses them
+    from export import RegisterWorkbook
+
+    if append:
+        append_to_register(append, (row for _, _, row in results), out)
+        return
+    out = out or "policy_register.xlsx"
+    insurer_columns = {name: pipeline.insurer_columns(name, fields) for name in pipeline.INSURERS}
+    written = 0
+    with RegisterWorkbook(out, insurer_columns, pipeline.register_columns(fields)) as book:
+        for insurer, data, row in results:
+            book.add(insurer, data, row)
+            written += 1
+    print(f"Wrote {written} policies to {out}")
+
+
+def print_report(report):
+    for label, paths in report.items():
+        if paths:
+            print(f"{label} ({len(paths)}): {', '.join(paths)}")
+    return 1 if report["Failed"] else 0
+
+
+# --- Commands ---
+def cmd_export(args):
+    files, skipped = hash_files(iter_pdfs(args.paths))
+    report = new_report(skipped)
+    archive = None
+    if args.archive:
+        from archive import Archive
+
+        archive = Archive(args.archive)
+    results = extract_all(files, args.insurer, report, args.fields, args.jobs, archive)
+    write_register(results, args.out, args.append, args.fields)
+    return print_report(report)
+
+
+def cmd_reextract(args):
+    from archive import Archive
+
+    changed, documents, fields = 0, 0, {}
+
+    def results():
+        nonlocal changed, documents
+        # Copies are flagged within the archive, not against earlier batches
+        first = {}
+        for insurer, record, names in Archive(args.archive).reextract(args.dry_run):
+            documents += 1
+            changed += bool(names)
+            for name in names:
+                fields[f"{insurer} / {name}"] = fields.get(f"{insurer} / {name}", 0) + 1
+            key = policy_key(record)
+            record["Duplicate Of"] = first.setdefault(key, record["File Name"]) if key else ""
+            if record["Duplicate Of"] == record["File Name"]:
+                record["Duplicate Of"] = ""
+            yield insurer, record, pipeline.canonical(record, insurer)
+
+    if args.out:
+        write_register(results(), args.out)
+    else:
+        for _ in results():
+            pass
+    verb = "would re-extract" if args.dry_run else "re-extracted"
+    print(f"{documents} archived document(s); {verb} {changed}")
+    for name, count in sorted(fields.items()):
+        print(f"  {name}: {count}")
+    return 0
+
+
+def cmd_shard_plan(args):
+    import shard
+
+    manifest = shard.plan(args.paths, args.shared, args.shards, args.fields)
+    print(f"Planned {len(manifest['files'])} file(s) in {args.shards} shard(s) under {args.shared}")
+    if manifest["skipped"]:
+        print(f"Skipped identical ({len(manifest['skipped'])}): {', '.join(manifest['skipped'])}")
+    return 0
+
+
+def cmd_shard_work(args):
+    import shard
+
+    if args.processes > 1:
+        done = shard.work_parallel(args.shared, args.processes, args.insurer, args.reclaim_after)
+    else:
+        done = shard.work(args.shared, args.insurer, args.reclaim_after)
+    print(f"Processed {len(done)} shard(s); progress: {shard.progress(args.shared)}")
+    return 0
+
+
+def cmd_shard_merge(args):
+    import shard
+
+    report = new_report()
+    try:
+        results = shard.merge(args.shared, report, args.partial)
+    except RuntimeError as e:
+        print(f"Cannot merge {args.shared}: {e} (wait for the workers, or pass --partial)", file=sys.stderr)
+        return 2
+    write_register(results, args.out, args.append, shard.load_manifest(args.shared).get("fields"))
+    return print_report(report)
+
+
+def cmd_reconcile(args):
+    import reconcile
+
+    try:
+        lines, header, policy_column, amount_column = reconcile.load_statement(
+            args.statement, args.policy_column, args.amount_column)
+    except ValueError as e:
+        print(f"Cannot read {args.statement}: {e}", file=sys.stderr)
+        return 2
+    rows = reconcile.load_register(args.register, args.register)
+    tolerance = reconcile.amount_paise(args.tolerance)
+    report = reconcile.reconcile(rows, lines, policy_column, amount_column, tolerance)
+    out = args.out or "reconciliation.xlsx"
+    reconcile.write_report(out, report, header)
+    counts = ", ".join(f"{len(report[name])} {name.lower()}" for name in report)
+    print(f"Reconciled {len(rows)} policies against {len(lines)} statement lines "
+          f"(policy: {policy_column!r}, amount: {amount_column!r}): {counts}. Wrote {out}")
+    return 0
+
+
+def field_list(value):
+    """Parses a comma-separated list of combined-register column names (any case)."""
+    names = {col.lower(): col for col in pipeline.EXTRACTED_COLUMNS}
+    fields = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [field for field in fields if field.lower() not in names]
+    if unknown or not fields:
+        raise argparse.ArgumentTypeError(
+            f"unknown field(s) {', '.join(unknown) or '(none given)'}; choose from: {', '.join(pipeline.EXTRACTED_COLUMNS)}")
+    return [names[field.lower()] for field in fields]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Extract insurance policy PDFs into Excel registers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="extract PDFs into one consolidated register workbook")
+    export.add_argument("paths", nargs="+", help="PDF files or directories")
+    export.add_argument("-o", "--out", help="output workbook (default: policy_register.xlsx, or register_additions.xlsx with --append)")
+    export.add_argument("--insurer", choices=list(pipeline.INSURERS), help="use this insurer's extractor instead of detecting it")
+    export.add_argument("--append", metavar="REGISTER", help="existing register (.xlsx or .csv): write only new or changed rows")
+    export.add_argument("--fields", type=field_list, metavar="A,B,...", help="extract only these register columns, e.g. \"Policy No,Premium Paid (Incl. GST)\"")
+    export.add_argument("--archive", metavar="DIR", help="keep each document's text and rule versions here for 'reextract'")
+    export.add_argument("-j", "--jobs", type=int, default=1, help="extraction processes; above 1, reading, extraction and writing overlap (default: 1)")
+    export.set_defaults(func=cmd_export)
+
+    reext = commands.add_parser("reextract", help="re-run only the fields whose rules changed, over an archive's text")
+    reext.add_argument("archive", help="directory written by 'export --archive'")
+    reext.add_argument("-o", "--out", help="also write every archived record to this register workbook")
+    reext.add_argument("--dry-run", action="store_true", help="only count the documents and fields that would be re-extracted")
+    reext.set_defaults(func=cmd_reextract)
+
+    recon = commands.add_parser("reconcile", help="match register premiums against a payment statement")
+    recon.add_argument("register", help="register written by export (.xlsx or .csv)")
+    recon.add_argument("statement", help="bank or aggregator statement (.csv)")
+    recon.add_argument("-o", "--out", help="report workbook (default: reconciliation.xlsx)")
+    recon.add_argument("--policy-column", help="statement column with the policy number (default: first header containing 'polic')")
+    recon.add_argument("--amount-column", help="statement column with the amount paid (default: first header naming an amount, premium, paid or credit)")
+    recon.add_argument("--tolerance", default="0", help="largest difference still counted as a match, in rupees (default: 0)")
+    recon.set_defaults(func=cmd_reconcile)
+
+    shard = commands.add_parser("shard", help="split a batch across worker processes or machines sharing a directory")
+    steps = shard.add_subparsers(dest="step", required=True)
+    plan = steps.add_parser("plan", help="hash the inputs and write a shard manifest")
+    plan.add_argument("shared", help="shared directory for the manifest and shard results")
+    plan.add_argument("paths", nargs="+", help="PDF files or directories (paths must be readable by every worker)")
+    plan.add_argument("-n", "--shards", type=int, default=16, help="number of shards (default: 16)")
+    plan.add_argument("--fields", type=field_list, metavar="A,B,...", help="extract only these register columns in every shard")
+    plan.set_defaults(func=cmd_shard_plan)
+    work = steps.add_parser("work", help="process unclaimed shards until none are left")
+    work.add_argument("shared")
+    work.add_argument("-p", "--processes", type=int, default=1, help="local worker processes (default: 1)")
+    work.add_argument("--insurer", choices=list(pipeline.INSURERS), help="use this insurer's extractor instead of detecting it")
+    work.add_argument("--reclaim-after", type=float, metavar="SECONDS", help="take over shards locked longer than this (crashed workers)")
+    work.set_defaults(func=cmd_shard_work)
+    merge = steps.add_parser("merge", help="merge finished shards into one register, in manifest order")
+    merge.add_argument("shared")
+    merge.add_argument("-o", "--out", help="output workbook (default: policy_register.xlsx)")
+    merge.add_argument("--append", metavar="REGISTER", help="existing register (.xlsx or .csv): write only new or changed rows")
+    merge.add_argument("--partial", action="store_true", help="merge the finished shards even if others are pending")
+    merge.set_defaults(func=cmd_shard_merge)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
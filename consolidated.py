@@ -0,0 +1,229 @@
+import streamlit as st
+import pandas as pd
+import os
+import tempfile
+import pipeline
+import preflight
+import register
+from cache import EXTRACTIONS
+from export import RegisterWorkbook
+from results_view import show_results
+from dedupe import DuplicateIndex, batch_id, session_batch, unique_uploads
+from pattern_stats import save_stats
+
+
+# Consolidated results depend on insurer detection and every extractor
+EXTRACTOR_MODULES = ("pipeline",) + tuple(pipeline.INSURERS.values())
+
+
+# --- Append to Master Register ---
+def append_rows(rows, existing):
+    index = register.load_index(existing, existing.name)
+    new, changed = register.new_or_changed(rows, index)
+    st.info(f"{len(new)} new and {len(changed)} changed row(s) against {existing.name} ({len(index)} rows indexed).")
+    header = register.read_header(existing, existing.name)
+
+    if register.is_csv(existing.name):
+        # CSV registers are returned whole: the original bytes plus the new rows
+        data = existing.getvalue()
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        data += register.csv_rows(new + changed, header).encode("utf-8")
+        st.download_button(
+            label="📥 Download Updated Register (CSV)",
+            data=data,
+            file_name=existing.name,
+            mime="text/csv",
+        )
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "register_additions.xlsx")
+            register.write_additions(path, new + changed, header)
+            with open(path, "rb") as f:
+                additions = f.read()
+        st.download_button(
+            label="📥 Download New/Changed Rows (Excel)",
+            data=additions,
+            file_name="register_additions.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+
+# --- Batch Processing ---
+def extract_uploads(uploaded_files, report, insurer=None, fields=None, skip_duplicates=False,
+                    progress=None, batch=None):
+    """
+    Runs an upload the way every page does: identical files dropped, each
+    file served from the shared cache or triaged and extracted (with
+    `insurer`'s extractor, or the detected one) and duplicates flagged.
+    Yields (insurer, record) per extracted file; skipped, unrecognized,
+    rejected and failed files are noted in `report` (see new_report).
+    `fields` are combined-register names (None for all); `progress(n,
+    total, name)` is called per file; `batch` identifies the session (by
+    default, the files' contents). Learned state and the duplicate index are
+    saved once the uploads are exhausted.
+    """
+    files, skipped = unique_uploads(uploaded_files)
+    report["skipped"].extend(skipped)
+    batch = batch or batch_id(digest for _, digest in files)
+    duplicates = DuplicateIndex()
+    modules = EXTRACTOR_MODULES if insurer is None else ("pipeline", pipeline.INSURERS[insurer])
+
+    for n, (file, digest) in enumerate(files, 1):
+        if progress:
+            progress(n, len(files), file.name)
+        if skip_duplicates and duplicates.seen_file(digest, batch):
+            report["skipped"].append(file.name)
+            continue
+        cached = EXTRACTIONS.get(digest, modules, fields)
+        if cached is None:
+            triage = preflight.check(file)
+            if not triage.ok:
+                report["rejected"].append(triage.row(file.name))
+                continue
+            try:
+                cached = pipeline.extract_file(triage.reader, file.name, insurer, fields)
+            except Exception as e:
+                report["failed"].append((file.name, e))
+                continue
+            EXTRACTIONS.put(digest, modules, cached, fields)
+        found, data = cached
+        if found is None:
+            report["unrecognized"].append(file.name)
+            continue
+        # A cached record carries the name the bytes were first uploaded as
+        data["File Name"] = file.name
+        data["Duplicate Of"] = duplicates.register(data, file.name, digest, batch)
+        if skip_duplicates and data["Duplicate Of"]:
+            report["skipped"].append(file.name)
+            continue
+        yield found, data
+
+    duplicates.save()
+    save_stats()
+
+
+def new_report():
+    return {"skipped": [], "unrecognized": [], "rejected": [], "failed": []}
+
+
+def process_upload(uploaded_files, fields=None, skip_duplicates=False, progress=None, batch=None):
+    """
+    Runs one upload through extract_uploads and streams the rows into a
+    register workbook. Returns a dict of the workbook bytes, the combined
+    rows and the skipped, unrecognized, rejected and failed files.
+    """
+    report = new_report()
+    insurer_columns = {name: pipeline.insurer_columns(name, fields) for name in pipeline.INSURERS}
+    combined = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy_register.xlsx")
+        # Rows are streamed into the workbook as each file is extracted
+        with RegisterWorkbook(path, insurer_columns, pipeline.register_columns(fields)) as book:
+            uploads = extract_uploads(uploaded_files, report, None, fields, skip_duplicates, progress, batch)
+            for insurer, data in uploads:
+                row = pipeline.canonical(data, insurer)
+                book.add(insurer, data, row)
+                combined.append(row)
+        with open(path, "rb") as f:
+            workbook = f.read()
+
+    return dict(report, workbook=workbook, rows=combined)
+
+
+def process_insurer_upload(insurer, uploaded_files, fields=None, skip_duplicates=False, batch=None):
+    """
+    An insurer page's variant of process_upload: every file goes to
+    `insurer`'s extractor and `fields` are the insurer's own column names.
+    Returns a dict of the insurer records and the skipped, unrecognized,
+    rejected and failed files.
+    """
+    report = new_report()
+    if fields is not None:
+        fields = [pipeline.COLUMN_ALIASES.get(col, col) for col in fields]
+    uploads = extract_uploads(uploaded_files, report, insurer, fields, skip_duplicates, batch=batch)
+    return dict(report, records=[data for _, data in uploads])
+
+
+# --- Shared Page Widgets ---
+def upload_form(columns):
+    """
+    The uploader, Skip duplicates checkbox and field picker of an insurer
+    page with these `columns`. Returns (uploaded files, skip duplicates,
+    fields or None for all, columns to show).
+    """
+    uploaded_files = st.file_uploader("Upload Policy PDFs", type=["pdf"], accept_multiple_files=True)
+    skip_duplicates = st.checkbox("Skip duplicates (identical files, or a Policy No + Chassis already extracted)")
+    field_options = [col for col in columns if col not in ("File Name", "Duplicate Of")]
+    selected_fields = st.multiselect("Fields to extract", field_options, default=field_options,
+                                     help="Leave out fields you don't need to speed up large batches.")
+    fields = selected_fields if 0 < len(selected_fields) < len(field_options) else None
+    shown_columns = [col for col in columns if fields is None or col in fields or col in ("File Name", "Duplicate Of")]
+    return uploaded_files, skip_duplicates, fields, shown_columns
+
+
+def show_report(result):
+    """Notes the files of an upload that were skipped, set aside or failed."""
+    for name, error in result["failed"]:
+        st.error(f"Failed to process file {name}: {error}")
+    if result["skipped"]:
+        st.info(f"Skipped {len(result['skipped'])} duplicate file(s): {', '.join(result['skipped'])}")
+    if result["unrecognized"]:
+        st.warning(f"Could not recognize the insurer of {len(result['unrecognized'])} file(s): {', '.join(result['unrecognized'])}")
+    if result["rejected"]:
+        st.warning(f"Set aside {len(result['rejected'])} file(s) that cannot be extracted as-is:")
+        st.table(pd.DataFrame(result["rejected"]))
+
+
+# --- Streamlit App ---
+def main(standalone=True):
+    # --- Streamlit Config ---
+    if standalone:
+        st.set_page_config(page_title="Consolidated Policy Register", layout="centered")
+    st.title("📚 Consolidated Policy Register → Excel")
+    st.write("Upload policy PDFs from any supported insurer (Tata AIG, Royal Sundaram, Reliance, Zurich Kotak, National). Each file is routed to its insurer's extractor and written to one workbook with a sheet per insurer plus a combined sheet.")
+
+    # --- File Upload ---
+    uploaded_files = st.file_uploader("Upload Policy PDFs", type=["pdf"], accept_multiple_files=True)
+    skip_duplicates = st.checkbox("Skip duplicates (identical files, or a Policy No + Chassis already extracted)")
+    selected_fields = st.multiselect("Fields to extract", pipeline.EXTRACTED_COLUMNS, default=pipeline.EXTRACTED_COLUMNS,
+                                     help="Leave out fields you don't need to speed up large batches.")
+    fields = selected_fields if 0 < len(selected_fields) < len(pipeline.EXTRACTED_COLUMNS) else None
+
+    # --- Append Mode ---
+    with st.expander("➕ Append to an existing master register"):
+        existing = st.file_uploader("Master register (Excel or CSV)", type=["xlsx", "csv"])
+        st.caption("Only its Policy No, File Name and Row Hash columns are read; you get just the new or changed rows.")
+
+    # --- Main Processing ---
+    if uploaded_files:
+        progress = st.progress(0.0)
+        result = process_upload(
+            uploaded_files, fields, skip_duplicates,
+            lambda n, total, name: progress.progress(n / total, text=f"Extracting {name}"),
+            session_batch(st.session_state),
+        )
+        combined, workbook = result["rows"], result["workbook"]
+        show_report(result)
+
+        df = pd.DataFrame(combined, columns=pipeline.register_columns(fields))
+        st.success(f"✅ Extraction complete! {len(df)} policies across {df['Insurer'].nunique()} insurer(s).")
+        show_results(df, "consolidated_results")
+
+        st.download_button(
+            label="📥 Download Consolidated Register (Excel)",
+            data=workbook,
+            file_name="policy_register.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+        if existing is not None:
+            append_rows(combined, existing)
+
+    st.markdown("---")
+    st.caption("Built with 💙 Streamlit + PyPDF2 + Regex | One workbook for Tata AIG, Royal Sundaram, Reliance, Zurich Kotak & National")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import re
+import threading
+import uuid
+
+import store
+
+# --- Duplicate detection ---
+# Identical uploads are recognized by a hash of their bytes before any parsing;
+# re-issued copies of a policy are recognized afterwards by Policy No +
+# CHASSIS NUM. Both are remembered across batches in a small JSON index.
+INDEX_FILE = "duplicate_index.json"
+
+_lock = threading.Lock()
+
+
+def read_bytes(file):
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    file.seek(0)
+    return data
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def unique_uploads(files):
+    """
+    Returns ([(file, digest), ...], skipped_names), dropping files whose bytes
+    are identical to an earlier file in the same upload.
+    """
+    unique, skipped, seen = [], [], set()
+    for file in files:
+        digest = content_hash(read_bytes(file))
+        if digest in seen:
+            skipped.append(file.name)
+            continue
+        seen.add(digest)
+        unique.append((file, digest))
+    return unique, skipped
+
+
+def batch_id(digests):
+    """Identifies a command-line batch by its contents, so re-running the same batch matches."""
+    return hashlib.sha256("".join(sorted(digests)).encode("ascii")).hexdigest()[:16]
+
+
+def session_batch(state):
+    """
+    Identifies the uploads of one Streamlit session (`st.session_state`), so
+    its reruns -- including those after files are added to the uploader --
+    are one batch.
+    """
+    if "upload_batch" not in state:
+        state["upload_batch"] = uuid.uuid4().hex[:16]
+    return state["upload_batch"]
+
+
+def policy_key(record):
+    # Records extracted with a field subset that leaves out the key fields are not indexed
+    if "Policy No" not in record or "CHASSIS NUM" not in record:
+        return None
+    policy = re.sub(r"\s+", "", str(record.get("Policy No", "N/A"))).upper()
+    if policy in ("", "N/A") or policy.startswith("ERROR"):
+        return None
+    chassis = re.sub(r"\s+", "", str(record.get("CHASSIS NUM", "N/A"))).upper()
+    return f"{policy}|{'' if chassis == 'N/A' else chassis}"
+
+
+class DuplicateIndex:
+    """Files and policies seen in previous batches, persisted under STATE_DIR."""
+
+    def __init__(self):
+        data = store.load_json(INDEX_FILE)
+        self.files = data.get("files", {})
+        self.policies = data.get("policies", {})
+
+    def seen_file(self, digest, batch):
+        """Returns the name the same bytes were first uploaded as in another batch, or None."""
+        entry = self.files.get(digest)
+        if entry and entry["batch"] != batch:
+            return entry["name"]
+        return None
+
+    def register(self, record, name, digest, batch):
+        """
+        Records an extracted policy. Returns the file name of an earlier copy
+        of the same policy in different bytes (a re-issued or re-scanned
+        copy), or "" if this is the first copy or the same file again.
+        """
+        self.files.setdefault(digest, {"name": name, "batch": batch})
+        key = policy_key(record)
+        if key is None:
+            return ""
+        entry = self.policies.setdefault(key, {"name": name, "digest": digest, "batch": batch})
+        # Identical bytes are the same file (see seen_file), not a copy of it
+        if entry["digest"] != digest and entry["name"] != name:
+            return entry["name"]
+        return ""
+
+    def save(self):
+        with _lock, store.locked(INDEX_FILE):
+            data = store.load_json(INDEX_FILE)
+            # Keep entries written by other sessions since we loaded the index
+            data.setdefault("files", {}).update(
+                {k: v for k, v in self.files.items() if k not in data["files"]}
+            )
+            data.setdefault("policies", {}).update(
+                {k: v for k, v in self.policies.items() if k not in data["policies"]}
+            )
+            store.save_json(INDEX_FILE, data)
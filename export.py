@@ -0,0 +1,80 @@
+import xlsxwriter
+
+# --- Streamed Excel export ---
+# Rows are written to the workbook as soon as each document is extracted
+# (xlsxwriter constant_memory mode keeps only the current row in memory), and
+# a sheet that reaches Excel's row limit continues on "<name> (2)", ...
+EXCEL_MAX_ROWS = 1_048_576
+MAX_SHEET_NAME = 31
+COMBINED_SHEET = "All Policies"
+
+
+class _Sheet:
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+        self.worksheet = None
+        self.part = 0
+        self.row = EXCEL_MAX_ROWS    # forces a worksheet on the first row
+
+
+class StreamingWorkbook:
+    """
+    Writes an .xlsx file row by row. Sheets are declared with `add_sheet` and
+    created on their first row; `write` takes a dict keyed by column name.
+    """
+
+    def __init__(self, path, max_rows=EXCEL_MAX_ROWS):
+        self.workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.header_format = self.workbook.add_format({"bold": True, "border": 1})
+        self.max_rows = max_rows
+        self.sheets = {}
+
+    def add_sheet(self, name, columns):
+        self.sheets[name] = _Sheet(name, list(columns))
+
+    def _next_worksheet(self, sheet):
+        sheet.part += 1
+        suffix = "" if sheet.part == 1 else f" ({sheet.part})"
+        title = sheet.name[:MAX_SHEET_NAME - len(suffix)] + suffix
+        sheet.worksheet = self.workbook.add_worksheet(title)
+        sheet.worksheet.write_row(0, 0, sheet.columns, self.header_format)
+        sheet.row = 1
+
+    def write(self, name, record):
+        sheet = self.sheets[name]
+        if sheet.row >= self.max_rows:
+            self._next_worksheet(sheet)
+        values = [record.get(col, "N/A") for col in sheet.columns]
+        sheet.worksheet.write_row(sheet.row, 0, ["N/A" if v is None else v for v in values])
+        sheet.row += 1
+
+    def close(self):
+        # Declared sheets that never received a row still get their header
+        for sheet in self.sheets.values():
+            if sheet.worksheet is None:
+                self._next_worksheet(sheet)
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RegisterWorkbook(StreamingWorkbook):
+    """
+    The consolidated register: one sheet per insurer (in that insurer's own
+    columns) plus a combined sheet in the common register columns.
+    """
+
+    def __init__(self, path, insurer_columns, combined_columns, max_rows=EXCEL_MAX_ROWS):
+        super().__init__(path, max_rows)
+        self.add_sheet(COMBINED_SHEET, combined_columns)
+        for insurer, columns in insurer_columns.items():
+            self.add_sheet(insurer, columns)
+
+    def add(self, insurer, record, combined_record):
+        self.write(COMBINED_SHEET, combined_record)
+        self.write(insurer, record)
@@ -0,0 +1,27 @@
+# --- Field subsets ---
+# Extractors accept `fields` (None for every column). Only the requested
+# fields and the fields they are derived from (the module's
+# FIELD_DEPENDENCIES) are computed, and only the requested ones are returned.
+
+
+def resolve(fields, columns, dependencies=None):
+    """The set of fields an extractor has to compute for the requested `fields`."""
+    if fields is None:
+        return set(columns)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+    wanted, pending = set(), list(fields)
+    while pending:
+        field = pending.pop()
+        if field not in wanted:
+            wanted.add(field)
+            pending.extend((dependencies or {}).get(field, ()))
+    return wanted
+
+
+def select(record, fields):
+    """The requested fields of a record, in the record's order (all of it when `fields` is None)."""
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields}
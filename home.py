@@ -1,5 +1,6 @@
 import streamlit as st
-import os
+import importlib
+from cache import EXTRACTIONS
 
 # --- Streamlit Page Config (only once) ---
 st.set_page_config(page_title="📄 Multi-Company Policy Extractor", layout="centered")
@@ -11,19 +12,20 @@ st.write("Extract policy details from PDFs for **Tata AIG**, **Royal Sundaram**,
 st.sidebar.header("🏢 Choose Insurance Company")
 company = st.sidebar.selectbox(
     "Select the Company",
-    ["Tata AIG", "Royal Sundaram", "Reliance", "Zurich Kotak","National"]
+    ["Tata AIG", "Royal Sundaram", "Reliance", "Zurich Kotak","National", "All Companies (Consolidated)"]
 )
 
-# --- Map Company to Script File ---
-company_scripts = {
-    "Tata AIG": "tata.py",
-    "Royal Sundaram": "royal.py",
-    "Reliance": "reliance.py",
-    "Zurich Kotak": "kotak.py",
-    "National": "national.py"
+# --- Map Company to Page Module ---
+company_pages = {
+    "Tata AIG": "tata",
+    "Royal Sundaram": "royal",
+    "Reliance": "reliance",
+    "Zurich Kotak": "kotak",
+    "National": "national",
+    "All Companies (Consolidated)": "consolidated"
 }
 
-selected_script = company_scripts[company]
+selected_page = company_pages[company]
 
 st.sidebar.markdown("---")
 st.sidebar.info(f"👆 Selected: {company}")
@@ -31,26 +33,19 @@ st.sidebar.info(f"👆 Selected: {company}")
 # --- Load and Display ---
 st.markdown("---")
 
-if os.path.exists(selected_script):
+# Pages are imported once per process and their main() re-run on each
+# rerun; the page config above already applies, so they skip their own.
+try:
+    page = importlib.import_module(selected_page)
+except ImportError as e:
+    st.error(f"Extractor module not found: {selected_page} ({e})")
+else:
     st.success(f"Running extractor for **{company}**")
-    # Read the file content
-    with open(selected_script, "r", encoding="utf-8") as f:
-        code = f.read()
-
-    # Remove duplicate Streamlit config lines to avoid set_page_config() error
-    cleaned_lines = []
-    for line in code.splitlines():
-        if "st.set_page_config" in line:
-            continue
-        cleaned_lines.append(line)
-    cleaned_code = "\n".join(cleaned_lines)
-
-    # Execute safely inside this Streamlit session
     try:
-        exec(cleaned_code, globals())
+        page.main(standalone=False)
     except Exception as e:
         st.error(f"❌ Error while running {company} extractor: {e}")
-else:
-    st.error(f"Extractor file not found: {selected_script}")
-
 
+# --- Shared Extraction Cache ---
+st.sidebar.markdown("---")
+st.sidebar.caption(f"🗄️ Shared cache: {EXTRACTIONS.summary()}")
@@ -0,0 +1,159 @@
+import functools
+import re
+
+# --- Positional text extraction ---
+# PyPDF2's text visitor reports where each piece of text is drawn. Keeping the
+# x/y coordinates lets us rebuild table rows and "Label: value" pairs
+# geometrically instead of guessing them from the flattened text, where
+# table cells run together and bilingual labels get interleaved.
+ROW_TOLERANCE = 3.0    # points between baselines still treated as one row
+CHAR_WIDTH = 0.5       # average glyph width as a fraction of the font size
+CELL_GAP = 1.0         # gap (in font sizes) that separates two cells
+
+
+class Fragment:
+    __slots__ = ("page", "x", "y", "size", "text")
+
+    def __init__(self, page, x, y, size, text):
+        self.page, self.x, self.y, self.size, self.text = page, x, y, size, text
+
+    @property
+    def end(self):
+        return self.x + len(self.text) * self.size * CHAR_WIDTH
+
+    def __repr__(self):
+        return f"Fragment({self.page}, {self.x:.0f}, {self.y:.0f}, {self.text!r})"
+
+
+def _position(cm, tm):
+    # Text space origin mapped through the current transformation matrix
+    x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+    y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+    scale = abs(tm[0] * cm[0]) or 1.0
+    return x, y, scale
+
+
+def extract_text_and_layout(reader, pages=()):
+    """
+    Extracts the text of every page, collecting positioned fragments for the
+    pages listed in `pages` during the same pass. Returns (text, Layout).
+    """
+    fragments = []
+    texts = []
+    for number, page in enumerate(reader.pages):
+        if number not in pages:
+            texts.append(page.extract_text() or "")
+            continue
+
+        def visit(text, cm, tm, font, size, number=number):
+            text = text.replace("\n", " ").strip()
+            if text:
+                x, y, scale = _position(cm, tm)
+                fragments.append(Fragment(number, x, y, (size or 10.0) * scale, text))
+
+        texts.append(page.extract_text(visitor_text=visit) or "")
+    return " ".join(texts), Layout(fragments)
+
+
+_LABEL_JUNK_RE = re.compile("[^0-9a-z\u0900-\u097f]+")
+
+
+def normalize_label(label):
+    return _LABEL_JUNK_RE.sub(" ", label.lower()).strip()
+
+
+# The labels extractors look up are constants, so their keys are kept
+_lookup_key = functools.lru_cache(maxsize=512)(normalize_label)
+
+
+def group_rows(fragments, tolerance=ROW_TOLERANCE):
+    """Groups fragments into rows (top to bottom), merging touching text into cells."""
+    rows = []
+    for frag in sorted(fragments, key=lambda f: (f.page, -f.y, f.x)):
+        row = rows[-1] if rows else None
+        if row and row[0].page == frag.page and abs(row[0].y - frag.y) <= tolerance:
+            row.append(frag)
+        else:
+            rows.append([frag])
+
+    cells = []
+    for row in rows:
+        merged = []
+        for frag in sorted(row, key=lambda f: f.x):
+            last = merged[-1] if merged else None
+            if last and frag.x - last.end < CELL_GAP * last.size:
+                last.text = f"{last.text} {frag.text}"
+            else:
+                merged.append(Fragment(frag.page, frag.x, frag.y, frag.size, frag.text))
+        cells.append(merged)
+    return cells
+
+
+class Layout:
+    """
+    Keyed lookup over the label/value pairs and table cells of a document.
+
+    A pair is a cell ending in ":" followed by the next cell on the row, or a
+    single "Label: value" cell. A table cell is a header from one row paired
+    with the value drawn in the same column on the row below.
+    """
+
+    def __init__(self, fragments):
+        self.fragments = list(fragments)
+        self.rows = group_rows(self.fragments)
+        self.values = {}
+        for i, row in enumerate(self.rows):
+            self._pairs(row)
+            if i + 1 < len(self.rows):
+                self._columns(row, self.rows[i + 1])
+
+    def __bool__(self):
+        return bool(self.values)
+
+    def dump(self):
+        """The positioned fragments as JSON-friendly lists (see `load`)."""
+        return [[f.page, f.x, f.y, f.size, f.text] for f in self.fragments]
+
+    @classmethod
+    def load(cls, fragments):
+        return cls(Fragment(*fragment) for fragment in fragments)
+
+    def _add(self, label, value):
+        key = normalize_label(label)
+        value = value.strip(" :-")
+        if key and value:
+            self.values.setdefault(key, value)
+
+    def _pairs(self, row):
+        for i, cell in enumerate(row):
+            if cell.text.endswith(":") and i + 1 < len(row):
+                self._add(cell.text, row[i + 1].text)
+            elif ":" in cell.text:
+                label, _, value = cell.text.partition(":")
+                self._add(label, value)
+
+    def _columns(self, header, below):
+        if len(header) < 2 or len(below) < 2 or header[0].page != below[0].page:
+            return
+        for cell in header:
+            if cell.text.endswith(":"):
+                continue
+            nearest = min(below, key=lambda c: abs(c.x - cell.x))
+            if abs(nearest.x - cell.x) <= 2 * cell.size and not nearest.text.endswith(":"):
+                self._add(cell.text, nearest.text)
+
+    def lookup(self, *labels, default="N/A"):
+        """
+        Returns the value of the first label found, matching the normalized
+        label exactly or, failing that, as a run of whole words in a key.
+        """
+        for label in labels:
+            key = _lookup_key(label)
+            if key in self.values:
+                return self.values[key]
+        for label in labels:
+            key = f" {_lookup_key(label)} "
+            for candidate, value in self.values.items():
+                if key in f" {candidate} ":
+                    return value
+        return default
@@ -0,0 +1,394 @@
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import store
+from cache import EXTRACTIONS
+
+# --- Load and soak test ---
+# Each session is a thread standing in for an operator on the consolidated
+# page: it uploads a batch of synthetic policy PDFs, runs it through
+# consolidated.process_upload (what a page run does: dedupe, pre-flight, the
+# shared cache, extraction, the register workbook), optionally waits, and
+# repeats. Streamlit runs every session's script in a thread of one process,
+# so the sessions share the GIL, the extraction cache and learned state just
+# as the app does. Latency per document and per batch, throughput and the
+# process RSS over time are reported; thresholds make it usable as a release
+# gate. Learned state goes to a scratch directory unless --state-dir is given.
+# With --shared-batch every session uploads the same batch each round, as when
+# operators re-run one set of files, so the extraction cache's hit rate shows.
+INSURER_NAMES = ["Tata AIG", "Royal Sundaram", "Reliance", "Zurich Kotak", "National"]
+FIRST_NAMES = ["Arjun", "Sunita", "Ramesh", "Priya", "Vikram", "Anita", "Rahul", "Meena"]
+LAST_NAMES = ["Mehta", "Sharma", "Kumar", "Iyer", "Singh", "Rao", "Gupta", "Nair"]
+MAKES = ["MARUTI SWIFT VXI", "HYUNDAI CRETA SX", "HONDA CITY V", "MAHINDRA XUV700 AX7", "TATA NEXON XZ"]
+
+
+# --- Synthetic corpus ---
+def _money(rng, low, high):
+    return f"{rng.randint(low, high):,}.{rng.randint(0, 99):02d}"
+
+
+def _date(rng):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2023, 2026)}"
+
+
+def _reg_no(rng):
+    letters = "ABCDEFGHJKLMNPRSTUVWXYZ"
+    return f"{rng.choice(['MH', 'DL', 'KA', 'TN'])} {rng.randint(1, 49):02d} {rng.choice(letters)}{rng.choice(letters)} {rng.randint(1000, 9999)}"
+
+
+def _serial(rng, prefix, digits):
+    return prefix + "".join(rng.choice("0123456789ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(digits))
+
+
+def policy_lines(insurer, rng):
+    """The text lines of a one-page schedule in roughly `insurer`'s layout, with random values."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    email = f"{name.split()[0].lower()}.{rng.randint(1, 999)}@gmail.com"
+    mobile = f"9{rng.randint(100000000, 999999999)}"
+    chassis, engine = _serial(rng, "MA", 12), _serial(rng, "EN", 8)
+    start, end = _date(rng), _date(rng)
+    if insurer == "Tata AIG":
+        return [
+            "TATA AIG General Insurance",
+            f"Policy No: TA{rng.randint(10**7, 10**8 - 1)}",
+            f"Insured Name: {name} Address Pune",
+            f"Period of Insurance {start} to {end}",
+            f"Chassis No: {chassis} Engine No: {engine}",
+            f"Total Premium Rs. {_money(rng, 5000, 60000)}",
+            f"Registration No: {_reg_no(rng)} Registration Authority",
+            f"Fuel Type: Petrol Customer contact number: {mobile} Email: {email}",
+        ]
+    if insurer == "Royal Sundaram":
+        return [
+            "Royal Sundaram General Insurance Co. Limited",
+            "Private Car Package Policy Schedule",
+            f"Customer ID: RS{rng.randint(100000, 999999)}",
+            f"Insured Name: Mr. {name}, 12 MG Road Address Chennai",
+            f"Policy No: VPC{rng.randint(10**6, 10**7 - 1)} Effective Date: {start} Expiry Date: {end}",
+            f"Product Name: Private Car Package Policy Sum Insured: {_money(rng, 200000, 900000)}",
+            f"Total Premium: {_money(rng, 5000, 60000)} Rs.",
+            f"Mobile No: {mobile}",
+            f"Email: {email} services@royalsundaram.in",
+            f"Make of the Vehicle: {rng.choice(MAKES)} Fuel Type: Petrol",
+            f"Chassis No: {chassis} Engine No: {engine}",
+            "Payment Mode: Online",
+        ]
+    if insurer == "Reliance":
+        return [
+            "Reliance General Insurance Company Limited",
+            "Reliance Private Car Package Policy - Policy Schedule",
+            f"Policy No: {rng.randint(10**14, 10**15 - 1)} Customer ID: RGI{rng.randint(10000, 99999)}",
+            f"Insured Name: Mrs. {name} Period of Insurance",
+            "Period of Insurance: From 00:00 Hrs on 05-Jun-2025 to Midnight of 04-Jun-2026",
+            f"IDV: {_money(rng, 200000, 900000)} Total Premium: {_money(rng, 5000, 60000)}",
+            f"Mobile No: {mobile}",
+            f"Email ID: {email}",
+            "Fuel Type: DIESEL",
+            f"Registration No: {_reg_no(rng)}",
+            f"Engine No/Chassis No: {engine}/{chassis}",
+            "Payment through payment aggregator",
+        ]
+    if insurer == "Zurich Kotak":
+        return [
+            "Zurich Kotak General Insurance",
+            f"Policy Number: {rng.randint(10**8, 10**9 - 1)}",
+            f"Customer ID: ZK{rng.randint(10000, 99999)} Insured Name: {name}",
+            f"Period of Insurance From: {start} To: {end}",
+            f"Total Premium (in ₹ ) {rng.randint(5000, 60000)}",
+            f"Mobile: {mobile} Email: {email}",
+            "Make / Model Year Chassis No. Engine No.",
+            f"HONDA CITY V 2021 {chassis} {engine} PETROL",
+        ]
+    return [
+        "National Insurance Company Limited",
+        f"Policy No: {rng.randint(10**19, 10**20 - 1)}",
+        f"Policy Effective from 00:00 hours on {start} to midnight of {end}",
+        f"Customer ID: NIC{rng.randint(100000, 999999)}",
+        f"Insured Name: {name}",
+        "Class of Vehicle: Private Car",
+        f"Vehicle IDV: {_money(rng, 200000, 900000)}",
+        f"Total Amount: {_money(rng, 5000, 60000)}",
+        f"Mobile No: {mobile}",
+        f"E-Mail: {email}",
+        f"Make: {rng.choice(MAKES)}",
+        f"Registration No: {_reg_no(rng)}",
+        f"Engine Number: {engine}",
+        f"Chassis Number: {chassis}",
+        "Mode of Payment: Cheque",
+    ]
+
+
+def text_pdf(lines):
+    """A minimal one-page PDF showing `lines` in Helvetica, as bytes."""
+    ops = ["BT /F1 10 Tf 12 TL 40 760 Td"]
+    for line in lines:
+        escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        ops.append(f"({escaped}) Tj T*")
+    ops.append("ET")
+    content = "\n".join(ops).encode("cp1252", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+class Upload(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile (a BytesIO with a name)."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def synthetic_batch(rng, size, prefix, junk=0.0):
+    """`size` uploads across the insurers; a `junk` fraction are not PDFs at all."""
+    batch = []
+    for n in range(size):
+        name = f"{prefix}-{n:04d}.pdf"
+        if rng.random() < junk:
+            batch.append(Upload(name, b"not a pdf " * 20))
+        else:
+            batch.append(Upload(name, text_pdf(policy_lines(rng.choice(INSURER_NAMES), rng))))
+    return batch
+
+
+# --- Measurements ---
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where the current value is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def percentile(values, p):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.documents = []     # (finished at, seconds)
+        self.batches = []       # (finished at, seconds, files)
+        self.samples = []       # (at, rss MB, documents so far)
+        self.errors = []
+
+    def now(self):
+        return time.perf_counter() - self.start
+
+    def document(self, seconds):
+        with self.lock:
+            self.documents.append((self.now(), seconds))
+
+    def batch(self, seconds, files):
+        with self.lock:
+            self.batches.append((self.now(), seconds, files))
+
+    def sample(self):
+        with self.lock:
+            self.samples.append((self.now(), rss_mb(), len(self.documents)))
+
+
+# --- Sessions ---
+def session(number, args, recorder, deadline, shared=None):
+    import consolidated
+
+    rng = random.Random(f"{args.seed}:{number}")
+    for round_no in range(args.rounds or sys.maxsize):
+        if deadline and time.perf_counter() >= deadline:
+            break
+        if shared:
+            uploads = [Upload(upload.name, upload.getvalue()) for upload in shared]
+        else:
+            uploads = synthetic_batch(rng, args.batch, f"s{number:02d}r{round_no:04d}", args.junk)
+        marks = []
+
+        def progress(n, total, name):
+            marks.append(time.perf_counter())
+
+        started = time.perf_counter()
+        try:
+            result = consolidated.process_upload(uploads, args.fields, args.skip_duplicates, progress)
+        except Exception as e:
+            recorder.errors.append(f"session {number}: {type(e).__name__}: {e}")
+            return
+        finished = time.perf_counter()
+        # A document's latency runs from its progress mark to the next one
+        for mark, following in zip(marks, marks[1:] + [finished]):
+            recorder.document(following - mark)
+        recorder.batch(finished - started, len(uploads))
+        recorder.errors.extend(f"{name}: {error}" for name, error in result["failed"])
+        if args.think:
+            time.sleep(rng.uniform(0, 2 * args.think))
+
+
+def run(args):
+    # The page's imports happen once per app process, not per session run
+    import consolidated  # noqa: F401
+
+    shared = None
+    if args.shared_batch:
+        shared = synthetic_batch(random.Random(f"{args.seed}:shared"), args.batch, "shared", args.junk)
+    recorder = Recorder()
+    recorder.sample()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    threads = [
+        threading.Thread(target=session, args=(n, args, recorder, deadline, shared), daemon=True)
+        for n in range(args.sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    next_sample = time.perf_counter() + args.sample
+    while threads:
+        threads[0].join(max(0, next_sample - time.perf_counter()))
+        threads = [thread for thread in threads if thread.is_alive()]
+        if time.perf_counter() >= next_sample:
+            recorder.sample()
+            next_sample += args.sample
+    recorder.sample()
+    return recorder
+
+
+# --- Report ---
+def summarize(recorder, args):
+    elapsed = recorder.now()
+    doc_times = [seconds for _, seconds in recorder.documents]
+    batch_times = [seconds for _, seconds, _ in recorder.batches]
+    rss = [mb for _, mb, _ in recorder.samples if mb is not None]
+    # Growth is measured after the first batch, once imports and caches have warmed up
+    warm = recorder.batches[0][0] if recorder.batches else 0
+    warm_rss = [mb for at, mb, _ in recorder.samples if mb is not None and at >= warm] or rss
+    cache = EXTRACTIONS.stats()
+    lookups = cache["hits"] + cache["misses"]
+    return {
+        "sessions": args.sessions,
+        "batch size": args.batch,
+        "shared batch": args.shared_batch,
+        "elapsed s": round(elapsed, 2),
+        "documents": len(doc_times),
+        "batches": len(batch_times),
+        "errors": len(recorder.errors),
+        "throughput docs/s": round(len(doc_times) / elapsed, 2) if elapsed else None,
+        "document latency ms": {f"p{p}": _ms(percentile(doc_times, p)) for p in (50, 90, 95, 99, 100)},
+        "batch latency s": {f"p{p}": _round(percentile(batch_times, p)) for p in (50, 90, 95, 99, 100)},
+        "rss MB": {
+            "start": _round(rss[0] if rss else None),
+            "after warm-up": _round(warm_rss[0] if warm_rss else None),
+            "peak": _round(max(rss) if rss else None),
+            "end": _round(rss[-1] if rss else None),
+            "growth after warm-up": _round(warm_rss[-1] - warm_rss[0] if warm_rss else None),
+        },
+        "cache": EXTRACTIONS.summary(),
+        "cache hit rate": round(cache["hits"] / lookups, 3) if lookups else None,
+        "timeline": [
+            {"at s": round(at, 1), "rss MB": _round(mb), "documents": done}
+            for at, mb, done in recorder.samples
+        ],
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def print_summary(summary, errors):
+    print(f"{summary['sessions']} session(s) x {summary['batch size']} {'shared ' if summary['shared batch'] else ''}files: "
+          f"{summary['documents']} documents in {summary['batches']} batches, {summary['elapsed s']}s, "
+          f"{summary['throughput docs/s']} docs/s, {summary['errors']} error(s)")
+    print("document latency ms: " + ", ".join(f"{k} {v}" for k, v in summary["document latency ms"].items()))
+    print("batch latency s:     " + ", ".join(f"{k} {v}" for k, v in summary["batch latency s"].items()))
+    print("rss MB:              " + ", ".join(f"{k} {v}" for k, v in summary["rss MB"].items()))
+    print(f"cache:               {summary['cache']}")
+    print(f"\n{'at s':>8} {'rss MB':>8} {'documents':>10}")
+    for point in summary["timeline"]:
+        print(f"{point['at s']:>8} {point['rss MB'] if point['rss MB'] is not None else '-':>8} {point['documents']:>10}")
+    for error in errors[:10]:
+        print(f"error: {error}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load/soak test: concurrent upload sessions against the extractors.")
+    parser.add_argument("-s", "--sessions", type=int, default=10, help="concurrent operator sessions (default: 10)")
+    parser.add_argument("-b", "--batch", type=int, default=100, help="files per uploaded batch (default: 100)")
+    parser.add_argument("-r", "--rounds", type=int, default=1, help="batches per session; 0 to run for --duration (default: 1)")
+    parser.add_argument("-d", "--duration", type=float, help="stop starting new batches after this many seconds (soak runs)")
+    parser.add_argument("--think", type=float, default=0, help="mean pause between a session's batches, in seconds")
+    parser.add_argument("--shared-batch", action="store_true",
+                        help="every session re-uploads one shared batch instead of its own new files")
+    parser.add_argument("--junk", type=float, default=0.02, help="fraction of uploads that are not PDFs (default: 0.02)")
+    parser.add_argument("--fields", help="comma-separated register columns to extract (default: all)")
+    parser.add_argument("--skip-duplicates", action="store_true", help="as the page's 'Skip duplicates' checkbox")
+    parser.add_argument("--sample", type=float, default=1.0, help="RSS sampling interval in seconds (default: 1)")
+    parser.add_argument("--seed", default="loadtest", help="seed for the synthetic corpus")
+    parser.add_argument("--state-dir", help="learned-state directory to use (default: a scratch directory)")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if the p95 document latency exceeds this")
+    parser.add_argument("--max-rss-growth", type=float, metavar="MB", help="fail if RSS grows more than this after warm-up")
+    parser.add_argument("--json", metavar="OUT", help="also write the summary as JSON")
+    args = parser.parse_args(argv)
+    if not args.rounds and not args.duration:
+        parser.error("--rounds 0 needs --duration")
+    if args.fields:
+        from cli import field_list
+
+        args.fields = field_list(args.fields)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        store.STATE_DIR = args.state_dir or scratch
+        recorder = run(args)
+    summary = summarize(recorder, args)
+    print_summary(summary, recorder.errors)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(summary, **{"error list": recorder.errors}), f, indent=1)
+
+    failures = []
+    p95 = summary["document latency ms"]["p95"]
+    if args.max_p95_ms is not None and p95 is not None and p95 > args.max_p95_ms:
+        failures.append(f"p95 document latency {p95}ms > {args.max_p95_ms}ms")
+    growth = summary["rss MB"]["growth after warm-up"]
+    if args.max_rss_growth is not None and growth is not None and growth > args.max_rss_growth:
+        failures.append(f"RSS grew {growth}MB > {args.max_rss_growth}MB")
+    if recorder.errors:
+        failures.append(f"{len(recorder.errors)} error(s)")
+    print(f"\n{'FAIL: ' + '; '.join(failures) if failures else 'OK'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,57 @@
-import streamlit as st
-import pandas as pd
 import re
 from io import BytesIO
-from PyPDF2 import PdfReader
 from datetime import datetime
-
-# --- Streamlit Config ---
-st.set_page_config(page_title="PDF to Excel - Policy Extractor", layout="centered")
-st.title("📄 PDF Policy Extractor → Excel")
-st.write("Upload insurance policy PDFs (Tata AIG, Zurich Kotak, Royal Sundaram, ICICI Lombard, Reliance, National, etc.) to extract details into Excel.")
-
-# --- File Upload ---
-uploaded_files = st.file_uploader("Upload Policy PDFs", type=["pdf"], accept_multiple_files=True)
+from templates import search
+from bilingual import normalize, LabelIndex
+from fields import resolve, select
 
 # --- Output Columns ---
 columns = [
     "Customer Id", "Customer Name", "Policy No", "Effective Date", "Expiry Date",
     "Product Name", "Sum Insured / IDV", "Premium Paid (Incl. GST)", "Intermediary Name",
     "CUST_MOBILE_NUMBER", "CUST_EMAIL", "Fuel Type", "Vehicle No / Registration Number",
-    "CHASSIS NUM", "ENGINE NUM", "VEHICLE INFO", "Payment Mode", "File Name"
+    "CHASSIS NUM", "ENGINE NUM", "VEHICLE INFO", "Payment Mode", "File Name", "Duplicate Of"
 ]
 
+# --- Pages read positionally (bilingual schedule labels) ---
+LAYOUT_PAGES = (0, 1)
+
+# --- Fields derived from other fields ---
+# The intermediary "Name" label also matches the insured's name, which is dropped.
+FIELD_DEPENDENCIES = {"Intermediary Name": ["Customer Name"]}
+
+# --- Bilingual labels, matched on the normalized text (see bilingual.normalize) ---
+# Longer Hindi/English labels come before the English-only ones they contain.
+LABELS = {
+    "total amount hi": r"कु\s?ल\s*रा\s?शि.{0,40}?Total\s*Amount",
+    "vehicle idv": r"वा\s?ह\s?न\s*का\s*आई\.\s?डी\.\s?वी\s*\/\s*Vehicle\s*IDV|Vehicle\s*IDV|Insured\s*Declared\s*Value|Sum\s*Insured",
+    "total amount": r"Total\s*Amount",
+    "email": r"ई[-\s]*मे\s?ल|E[-\s]*Mail",
+}
+
+# --- Single-pattern fields ---
+# Fields read by one `find` with no fallback or cleanup (vectorized.py applies
+# these column-wise to a batch of documents).
+FIELD_PATTERNS = {
+    "Policy No": r"Policy\s*(?:No\.?|Number)\s*[:\-]?\s*([A-Z0-9\/\-]{6,})",
+    "Customer Id": r"(?:Customer\s*ID|Client\s*ID)\s*[:\-]?\s*([0-9A-Z\/\-]+)",
+    "Fuel Type": r"(?:Type\s*of\s*Fuel|Fuel\s*Type)\s*[:\-]?\s*([A-Za-z]+)",
+    "VEHICLE INFO": r"(?:Make|Manufacturer)\s*[:\-]?\s*([A-Za-z0-9\s&\.\-]+)",
+    "Vehicle No / Registration Number": r"(?:Regn\.?\s*Number|Registration\s*No\.?)\s*[:\-]?\s*([A-Z]{2}[\s\-]?\d{2}[\s\-]?[A-Z]{1,2}[\s\-]?\d{4})",
+}
+
 # --- Helper Function ---
 def find(pattern, text, flags=re.IGNORECASE | re.DOTALL):
-    match = re.search(pattern, text, flags)
+    match = search(pattern, text, flags)
     return match.group(1).strip() if match and match.lastindex else "N/A"
 
 # --- Date Formatter ---
 def format_date(date_str):
+    # Formats whose separator the date lacks cannot match (see reliance.py)
+    spaced = len(date_str.split()) > 1
     for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d %B %Y"):
+        if not (spaced if fmt[2] == " " else fmt[2] in date_str):
+            continue
         try:
             return datetime.strptime(date_str.strip(), fmt).strftime("%d %b '%y")
         except:
@@ -36,160 +59,173 @@ def format_date(date_str):
     return date_str
 
 # --- Extraction Function ---
-def extract_policy_details(text, file_name):
-    t = re.sub(r'\s+', ' ', text.replace("\n", " "))
+def extract_policy_details(text, file_name=None, layout=None, fields=None):
+    wanted = resolve(fields, columns, FIELD_DEPENDENCIES)
+    policy_no = eff_date = exp_date = cust_id = cust_name = product = idv = premium = intermediary = "N/A"
+    mobile = cust_email = fuel = vehicle_info = reg_no = engine = chassis = pay_mode = "N/A"
+    t = normalize(text)
+    # The label index is only needed for the IDV, premium and email fallbacks
+    if wanted & {"Sum Insured / IDV", "Premium Paid (Incl. GST)", "CUST_EMAIL"}:
+        labels = LabelIndex(t, LABELS)
 
     # Detect National Insurance
     is_national = "national insurance" in t.lower()
 
     # --- Policy Number ---
-    policy_no = find(r"Policy\s*(?:No\.?|Number)\s*[:\-]?\s*([A-Z0-9\/\-]{6,})", t)
+    if "Policy No" in wanted:
+        policy_no = find(FIELD_PATTERNS["Policy No"], t)
 
     # --- Effective / Expiry Date ---
-    eff_date = exp_date = "N/A"
-    if is_national:
-        match = re.search(
-            r"Policy\s*Effective\s*from.*?on\s*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4}).*?to\s*midnight\s*of\s*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})",
-            t, re.IGNORECASE)
-        if match:
-            eff_date, exp_date = format_date(match.group(1)), format_date(match.group(2))
-    else:
-        match = re.search(
-            r"(?:Period\s*of\s*Insurance|Policy\s*Period).*?(?:From|Valid\s*from)[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4}).*?(?:To|Till|Up\s*to)[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})",
-            t, re.IGNORECASE)
-        if match:
-            eff_date, exp_date = format_date(match.group(1)), format_date(match.group(2))
+    if "Effective Date" in wanted or "Expiry Date" in wanted:
+        if is_national:
+            match = search(
+                r"Policy\s*Effective\s*from.*?on\s*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4}).*?to\s*midnight\s*of\s*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})",
+                t, re.IGNORECASE)
+            if match:
+                eff_date, exp_date = format_date(match.group(1)), format_date(match.group(2))
+        else:
+            match = search(
+                r"(?:Period\s*of\s*Insurance|Policy\s*Period).*?(?:From|Valid\s*from)[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4}).*?(?:To|Till|Up\s*to)[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})",
+                t, re.IGNORECASE)
+            if match:
+                eff_date, exp_date = format_date(match.group(1)), format_date(match.group(2))
 
     # --- Customer ID ---
-    cust_id = find(r"(?:Customer\s*ID|Client\s*ID)\s*[:\-]?\s*([0-9A-Z\/\-]+)", t)
+    if "Customer Id" in wanted:
+        cust_id = find(FIELD_PATTERNS["Customer Id"], t)
 
     # --- Customer Name ---
-    cust_name = find(r"(?:Insured|Customer|Policyholder)\s*Name\s*[:\-]?\s*([A-Za-z\s\.\']+)", t)
-    cust_name = cust_name.strip().title() if cust_name != "N/A" else "N/A"
+    if "Customer Name" in wanted:
+        cust_name = find(r"(?:Insured|Customer|Policyholder)\s*Name\s*[:\-]?\s*([A-Za-z\s\.\']+)", t)
+        cust_name = cust_name.strip().title() if cust_name != "N/A" else "N/A"
 
     # --- Product Name ---
-    if is_national:
-        product = find(r"Class\s*of\s*Vehicle\s*[:\-]?\s*([A-Za-z\s\/,]+)", t)
-    else:
-        product = find(r"(?:Product\s*Name|Policy\s*Type|Cover\s*Type)\s*[:\-]?\s*([A-Za-z\s\-\(\)\/]+)", t)
-    if product == "N/A" and "private car" in t.lower():
-        product = "Private Car Package Policy"
+    if "Product Name" in wanted:
+        if is_national:
+            product = find(r"Class\s*of\s*Vehicle\s*[:\-]?\s*([A-Za-z\s\/,]+)", t)
+        else:
+            product = find(r"(?:Product\s*Name|Policy\s*Type|Cover\s*Type)\s*[:\-]?\s*([A-Za-z\s\-\(\)\/]+)", t)
+        if product == "N/A" and "private car" in t.lower():
+            product = "Private Car Package Policy"
 
     # --- Sum Insured / IDV ---
-         # --- Sum Insured / IDV ---
-    # Handles bilingual "वाहन का आई.डी.वी/Vehicle IDV" or "Vehicle IDV" or "Total Value"
-    idv = find(
-        r"(?:वाहन\s*का\s*आई\.डी\.वी\/Vehicle\s*IDV|Vehicle\s*IDV|Insured\s*Declared\s*Value|Sum\s*Insured)\s*[`₹:\-]?\s*([\d,\.]+)",
-        t
-    )
-
-    if idv == "N/A":
-        idv = find(r"Total\s*Value\s*[₹:\-\s]*([\d,\.]+)", t)
-
-    # Clean up formatting
-    if idv != "N/A":
-        try:
-            idv = f"{float(idv.replace(',', '').strip()):,.2f}"
-        except:
-            pass
+    if "Sum Insured / IDV" in wanted:
+             # --- Sum Insured / IDV ---
+        # Handles bilingual "वाहन का आई.डी.वी/Vehicle IDV" or "Vehicle IDV" or "Total Value"
+        idv = find(r"([\d,]+(?:\.\d+)?)", layout.lookup("Vehicle IDV", "Insured Declared Value")) if layout else "N/A"
+        if idv == "N/A":
+            idv = labels.value_after("vehicle idv", r"\s*[`₹:\-]?\s*([\d,\.]+)")
+
+        if idv == "N/A":
+            idv = find(r"Total\s*Value\s*[₹:\-\s]*([\d,\.]+)", t)
+
+        # Clean up formatting
+        if idv != "N/A":
+            try:
+                idv = f"{float(idv.replace(',', '').strip()):,.2f}"
+            except:
+                pass
 
     # --- Premium (Premium Paid Incl. GST) ---
-         # --- Premium Paid (Incl. GST) ---
-            # --- Premium Paid (Incl. GST) ---
-    # Handles "कुल राशि Total Amount" in Hindi-English mix with any spacing or hidden characters
-    premium = find(
-        r"क\s*ु\s*ल\s*र\s*ा\s*श\s*ि.*?Total\s*Amount\s*[₹`:\-\s]*([\d,.,]+)",
-        t,
-        flags=re.IGNORECASE
-    )
-
-    # If still not found, try a simpler English-only fallback
-    if premium == "N/A":
-        premium = find(
-            r"Total\s*Amount\s*[₹`:\-\s]*([\d,.,]+)",
-            t,
-            flags=re.IGNORECASE
-        )
+    if "Premium Paid (Incl. GST)" in wanted:
+             # --- Premium Paid (Incl. GST) ---
+                # --- Premium Paid (Incl. GST) ---
+        # Handles "कुल राशि Total Amount" in Hindi-English mix with any spacing or hidden characters
+        premium = find(r"([\d,]+(?:\.\d+)?)", layout.lookup("Total Amount")) if layout else "N/A"
+        if premium == "N/A":
+            premium = labels.value_after("total amount hi", r"[₹`:\-\s]*([\d,.,]+)")
 
-    # Format cleanly
-    if premium != "N/A":
-        try:
-            premium = f"{float(premium.replace(',', '').strip()):,.2f}"
-        except:
-            pass
+        # If still not found, try a simpler English-only fallback
+        if premium == "N/A":
+            premium = labels.value_after("total amount", r"[₹`:\-\s]*([\d,.,]+)")
+
+        # Format cleanly
+        if premium != "N/A":
+            try:
+                premium = f"{float(premium.replace(',', '').strip()):,.2f}"
+            except:
+                pass
 
 
 
     # --- Intermediary ---
-    if is_national:
-        intermediary = find(r"\bName\s*[:\-]?\s*([A-Za-z\s\.\']+)", t)
-        if cust_name in intermediary:
-            intermediary = "N/A"
-    else:
-        intermediary = find(r"(?:Intermediary\s*Name|Agent\s*Name)\s*[:\-]?\s*([A-Za-z\s\.,]+)", t)
-    intermediary = re.sub(r"\b(Intermediary|Code)\b", "", intermediary).strip().title()
+    if "Intermediary Name" in wanted:
+        if is_national:
+            intermediary = find(r"\bName\s*[:\-]?\s*([A-Za-z\s\.\']+)", t)
+            if cust_name in intermediary:
+                intermediary = "N/A"
+        else:
+            intermediary = find(r"(?:Intermediary\s*Name|Agent\s*Name)\s*[:\-]?\s*([A-Za-z\s\.,]+)", t)
+        intermediary = re.sub(r"\b(Intermediary|Code)\b", "", intermediary).strip().title()
 
     # --- Customer Mobile Number ---
-    mobile = find(r"(?:Phone|Cell|Mobile\s*No\.?)\s*[:\-]?\s*([0-9\*\s]{8,15})", t)
-    if mobile != "N/A":
-        mobile = mobile.replace(" ", "").replace("*", "X")
+    if "CUST_MOBILE_NUMBER" in wanted:
+        mobile = find(r"(?:Phone|Cell|Mobile\s*No\.?)\s*[:\-]?\s*([0-9\*\s]{8,15})", t)
+        if mobile != "N/A":
+            mobile = mobile.replace(" ", "").replace("*", "X")
 
     # --- Customer Email (E-Mail:) ---
-        # --- Customer Email (E-Mail:) ---
-    # Capture only the email right after "E-Mail" or "ई-मेल"
-    cust_email_match = re.search(
-        r"(?:ई[-\s]*मेल|E[-\s]*Mail)\s*[:\-]?\s*([A-Za-z0-9.*_%+/-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})",
-        t
-    )
-
-    cust_email = cust_email_match.group(1).strip() if cust_email_match else "N/A"
-
-    # Step 2: Exclude known company/service domains even if matched
-    exclude_domains = [
-        "royalsundaram.in", "tataaig.com", "reliancegeneral.co.in",
-        "icicilombard.com", "nationalinsurance.nic.co.in", "nic.co.in",
-        "kotak.com", "hdfcergo.com", "tvs.in"
-    ]
-    if any(domain in cust_email.lower() for domain in exclude_domains):
-        # Fallback – look for a personal Gmail/Yahoo/Hotmail address elsewhere
-        all_emails = re.findall(
-            r"[A-Za-z0-9.*_%+/-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
-            t
-        )
-        for email in all_emails:
-            if not any(domain in email.lower() for domain in exclude_domains):
-                cust_email = email
-                break
-        else:
-            cust_email = "N/A"
-
-    cust_email = cust_email.replace(" ", "")
+    if "CUST_EMAIL" in wanted:
+            # --- Customer Email (E-Mail:) ---
+        # Capture only the email right after "E-Mail" or "ई-मेल"
+        cust_email = labels.value_after("email", r"\s*[:\-]?\s*([A-Za-z0-9.*_%+/-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})")
+
+        # Step 2: Exclude known company/service domains even if matched
+        exclude_domains = [
+            "royalsundaram.in", "tataaig.com", "reliancegeneral.co.in",
+            "icicilombard.com", "nationalinsurance.nic.co.in", "nic.co.in",
+            "kotak.com", "hdfcergo.com", "tvs.in"
+        ]
+        if any(domain in cust_email.lower() for domain in exclude_domains):
+            # Fallback – look for a personal Gmail/Yahoo/Hotmail address elsewhere
+            all_emails = re.findall(
+                r"[A-Za-z0-9.*_%+/-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+                t
+            )
+            for email in all_emails:
+                if not any(domain in email.lower() for domain in exclude_domains):
+                    cust_email = email
+                    break
+            else:
+                cust_email = "N/A"
+
+        cust_email = cust_email.replace(" ", "")
 
 
     # --- Fuel Type ---
-    fuel = find(r"(?:Type\s*of\s*Fuel|Fuel\s*Type)\s*[:\-]?\s*([A-Za-z]+)", t)
+    if "Fuel Type" in wanted:
+        fuel = find(FIELD_PATTERNS["Fuel Type"], t)
 
     # --- Vehicle Info ---
-    vehicle_info = find(r"(?:Make|Manufacturer)\s*[:\-]?\s*([A-Za-z0-9\s&\.\-]+)", t)
+    if "VEHICLE INFO" in wanted:
+        vehicle_info = find(FIELD_PATTERNS["VEHICLE INFO"], t)
 
     # --- Registration Number ---
-    reg_no = find(r"(?:Regn\.?\s*Number|Registration\s*No\.?)\s*[:\-]?\s*([A-Z]{2}[\s\-]?\d{2}[\s\-]?[A-Z]{1,2}[\s\-]?\d{4})", t)
+    if "Vehicle No / Registration Number" in wanted:
+        reg_no = find(FIELD_PATTERNS["Vehicle No / Registration Number"], t)
 
     # --- Engine / Chassis ---
-    engine = find(r"(?:Engine\s*or\s*M\/c\s*No\.?|Engine\s*Number)\s*[:\-]?\s*([A-Z0-9\s]+)", t)
-    chassis = find(r"(?:Chassis\s*Number|Chassis\s*No\.?)\s*[:\-]?\s*([A-Z0-9\s]+)", t)
+    if "ENGINE NUM" in wanted:
+        engine = layout.lookup("Engine or M/c No", "Engine Number") if layout else "N/A"
+        if engine == "N/A":
+            engine = find(r"(?:Engine\s*or\s*M\/c\s*No\.?|Engine\s*Number)\s*[:\-]?\s*([A-Z0-9\s]+)", t)
+    if "CHASSIS NUM" in wanted:
+        chassis = layout.lookup("Chassis Number", "Chassis No") if layout else "N/A"
+        if chassis == "N/A":
+            chassis = find(r"(?:Chassis\s*Number|Chassis\s*No\.?)\s*[:\-]?\s*([A-Z0-9\s]+)", t)
 
     # --- Payment Mode ---
-    if "online" in t.lower():
-        pay_mode = "Online Payment"
-    elif "aggregator" in t.lower():
-        pay_mode = "Payment Aggregator"
-    elif "cheque" in t.lower():
-        pay_mode = "Cheque"
-    else:
-        pay_mode = find(r"(?:Payment\s*Mode|Mode\s*of\s*Payment)\s*[:\-]?\s*([A-Za-z\s]+)", t)
-
-    return {
+    if "Payment Mode" in wanted:
+        if "online" in t.lower():
+            pay_mode = "Online Payment"
+        elif "aggregator" in t.lower():
+            pay_mode = "Payment Aggregator"
+        elif "cheque" in t.lower():
+            pay_mode = "Cheque"
+        else:
+            pay_mode = find(r"(?:Payment\s*Mode|Mode\s*of\s*Payment)\s*[:\-]?\s*([A-Za-z\s]+)", t)
+
+    return select({
         "Customer Id": cust_id,
         "Customer Name": cust_name,
         "Policy No": policy_no,
@@ -207,34 +243,51 @@ def extract_policy_details(text, file_name):
         "ENGINE NUM": engine,
         "VEHICLE INFO": vehicle_info,
         "Payment Mode": pay_mode
-    }
-
-# --- Main Processing ---
-if uploaded_files:
-    all_data = []
-    for file in uploaded_files:
-        reader = PdfReader(file)
-        text = " ".join(page.extract_text() or "" for page in reader.pages)
-        data = extract_policy_details(text, file.name)
-        data["File Name"] = file.name
-        all_data.append(data)
-
-    df = pd.DataFrame(all_data, columns=columns).fillna("N/A")
-
-    st.success("✅ Extraction complete! Review below:")
-    st.dataframe(df)
-
-    # --- Download Excel ---
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Policy Details")
-
-    st.download_button(
-        label="📥 Download Extracted Policy Data (Excel)",
-        data=output.getvalue(),
-        file_name="policy_extracted_data.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-
-st.markdown("---")
-st.caption("Built with 💙 Streamlit + PyPDF2 + Regex | Supports Tata AIG, Reliance, Zurich Kotak, Royal Sundaram, ICICI Lombard & National Insurance")
+    }, fields)
+
+# --- Streamlit App ---
+def main(standalone=True):
+    # Heavy UI dependencies load with the page, not with the extractors
+    import streamlit as st
+    import pandas as pd
+    from consolidated import process_insurer_upload, show_report, upload_form
+    from dedupe import session_batch
+    from results_view import show_results
+
+    # --- Streamlit Config ---
+    if standalone:
+        st.set_page_config(page_title="PDF to Excel - Policy Extractor", layout="centered")
+    st.title("📄 PDF Policy Extractor → Excel")
+    st.write("Upload insurance policy PDFs (Tata AIG, Zurich Kotak, Royal Sundaram, ICICI Lombard, Reliance, National, etc.) to extract details into Excel.")
+
+    # --- File Upload ---
+    uploaded_files, skip_duplicates, fields, shown_columns = upload_form(columns)
+
+    # --- Main Processing ---
+    if uploaded_files:
+        result = process_insurer_upload("National", uploaded_files, fields, skip_duplicates,
+                                        session_batch(st.session_state))
+        df = pd.DataFrame(result["records"], columns=shown_columns).fillna("N/A")
+        show_report(result)
+
+        st.success("✅ Extraction complete! Review below:")
+        show_results(df, "national_results")
+
+        # --- Download Excel ---
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Policy Details")
+
+        st.download_button(
+            label="📥 Download Extracted Policy Data (Excel)",
+            data=output.getvalue(),
+            file_name="policy_extracted_data.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+    st.markdown("---")
+    st.caption("Built with 💙 Streamlit + PyPDF2 + Regex | Supports Tata AIG, Reliance, Zurich Kotak, Royal Sundaram, ICICI Lombard & National Insurance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import copy
+import re
+import threading
+
+import store
+import templates
+
+# --- Adaptive fallback ordering ---
+# Fields such as Product Name or the insurance period are found by trying a
+# chain of alternative patterns. We count which alternative actually matched
+# per insurer and template, and once one alternative clearly dominates it is
+# tried first, so the common case costs one regex instead of a cascade of
+# misses over the full text. Promoting a later alternative only gives the same
+# value when no earlier one could also have matched, so only chains the caller
+# declares mutually exclusive are counted and reordered; chains ordered from
+# specific to generic (a labelled pattern, then a bare one) are simply tried in
+# their declared order, without the lock, the fingerprint or any counting.
+STATS_FILE = "pattern_stats.json"
+MIN_SAMPLES = 5        # hits needed before the learned order is trusted
+PROMOTE_SHARE = 0.8    # share of hits an alternative needs to be tried first
+ENABLED = True
+
+_lock = threading.Lock()
+_stats = None
+_pending = {}          # hits since the last save: {insurer/template: {field: {pattern: n}}}
+
+
+def _counts(insurer, template, field):
+    global _stats
+    if _stats is None:
+        _stats = store.load_json(STATS_FILE)
+    return _stats.setdefault(f"{insurer}/{template}", {}).setdefault(field, {})
+
+
+def _split(alternative):
+    if isinstance(alternative, tuple):
+        return alternative
+    return alternative, None
+
+
+def _order(patterns, counts):
+    order = list(range(len(patterns)))
+    if not ENABLED:
+        return order
+    total = sum(counts.get(p, 0) for p in patterns)
+    if total < MIN_SAMPLES:
+        return order
+    best = max(order, key=lambda i: counts.get(patterns[i], 0))
+    if best and counts.get(patterns[best], 0) / total >= PROMOTE_SHARE:
+        order.remove(best)
+        order.insert(0, best)
+    return order
+
+
+def _value(match, group):
+    if group is None:
+        group = 1 if match.re.groups else 0
+    value = match.group(*group) if isinstance(group, tuple) else match.group(group)
+    if isinstance(value, tuple):
+        value = tuple((v or "").strip() for v in value)
+        return value if any(value) else None
+    return (value or "").strip() or None
+
+
+def find_first(insurer, field, alternatives, text, flags=re.IGNORECASE | re.DOTALL, template=None, exclusive=False):
+    """
+    Returns the value captured by the first matching alternative, or None.
+
+    Each alternative is either a pattern or a (pattern, group) pair; group
+    defaults to the first capturing group (or the whole match) and may be a
+    tuple to capture several groups at once. A match whose captured value is
+    empty counts as a miss, like `find(...) or find(...)` chains do.
+    For `exclusive` chains, where no two alternatives can match the same
+    text, hits are counted per template (the fingerprint of the document
+    being extracted, see templates.document, unless `template` is given) and
+    the learned order is used; other chains are tried in order.
+    """
+    alternatives = [_split(a) for a in alternatives]
+    if exclusive:
+        template = template or templates.current_template(text) or "default"
+        patterns = [p for p, _ in alternatives]
+        with _lock:
+            order = _order(patterns, dict(_counts(insurer, template, field)))
+    else:
+        order = range(len(alternatives))
+
+    for i in order:
+        pattern, group = alternatives[i]
+        match = templates.search(pattern, text, flags)
+        if not match:
+            continue
+        value = _value(match, group)
+        if value is None:
+            continue
+        if exclusive:
+            _record(insurer, template, field, pattern)
+        return value
+    return None
+
+
+def _record(insurer, template, field, pattern):
+    with _lock:
+        counts = _counts(insurer, template, field)
+        counts[pattern] = counts.get(pattern, 0) + 1
+        pending = _pending.setdefault(f"{insurer}/{template}", {}).setdefault(field, {})
+        pending[pattern] = pending.get(pattern, 0) + 1
+
+
+def save_stats():
+    """
+    Adds the hits gathered since the last save to the counts on disk (call
+    once per batch); counts saved meanwhile by other processes are kept.
+    """
+    global _stats
+    with _lock:
+        if not _pending:
+            return
+        with store.locked(STATS_FILE):
+            stats = store.load_json(STATS_FILE)
+            for key, fields in _pending.items():
+                for field, hits in fields.items():
+                    counts = stats.setdefault(key, {}).setdefault(field, {})
+                    for pattern, n in hits.items():
+                        counts[pattern] = counts.get(pattern, 0) + n
+            store.save_json(STATS_FILE, stats)
+        _stats = stats
+        _pending.clear()
+
+
+def snapshot():
+    """A copy of the hit counts in memory, for restore()."""
+    with _lock:
+        return copy.deepcopy((_stats, _pending))
+
+
+def restore(saved):
+    """Puts back hit counts taken with snapshot()."""
+    global _stats, _pending
+    with _lock:
+        _stats, _pending = copy.deepcopy(saved)
@@ -0,0 +1,139 @@
+import hashlib
+import importlib
+import re
+
+from layout import extract_text_and_layout
+from templates import document
+
+# --- Insurer registry ---
+# Display name -> extractor module. Every module exposes `columns`,
+# `extract_policy_details(text, file_name=None, layout=None)` and optionally
+# `LAYOUT_PAGES` (pages read with text positions).
+INSURERS = {
+    "Tata AIG": "tata",
+    "Royal Sundaram": "royal",
+    "Reliance": "reliance",
+    "Zurich Kotak": "kotak",
+    "National": "national",
+}
+
+# Text that identifies the insurer of a schedule
+INSURER_KEYWORDS = {
+    "Tata AIG": r"tata\s*aig",
+    "Royal Sundaram": r"royal\s*sundaram",
+    "Reliance": r"reliance\s*general",
+    "Zurich Kotak": r"zurich\s*kotak|kotak\s*mahindra\s*general",
+    "National": r"national\s*insurance",
+}
+
+# --- Columns of the combined register ---
+COLUMNS = [
+    "Insurer", "Customer Id", "Customer Name", "Policy No", "Effective Date", "Expiry Date",
+    "Product Name", "Sum Insured / IDV", "Premium Paid (Incl. GST)", "Intermediary Name",
+    "Customer Mobile Number", "CUST_EMAIL", "Fuel Type", "Vehicle No / Registration Number",
+    "CHASSIS NUM", "ENGINE NUM", "VEHICLE INFO", "Payment Mode", "File Name", "Duplicate Of",
+    "Row Hash"
+]
+HASH_COLUMN = "Row Hash"
+
+# Insurer-specific column names -> combined register column
+COLUMN_ALIASES = {
+    "CUST_MOBILE_NUMBER": "Customer Mobile Number",
+    "Customer Number": "Customer Mobile Number",
+    "cust_email": "CUST_EMAIL",
+}
+
+# Columns filled in by the pipeline rather than extracted
+BOOKKEEPING_COLUMNS = ("Insurer", "File Name", "Duplicate Of", HASH_COLUMN)
+EXTRACTED_COLUMNS = [col for col in COLUMNS if col not in BOOKKEEPING_COLUMNS]
+
+
+def load_extractor(insurer):
+    return importlib.import_module(INSURERS[insurer])
+
+
+def detect_insurer(text):
+    """Returns the insurer whose name appears most often in `text`, or None."""
+    counts = {
+        insurer: len(re.findall(pattern, text, re.IGNORECASE))
+        for insurer, pattern in INSURER_KEYWORDS.items()
+    }
+    best = max(counts, key=counts.get)
+    return best if counts[best] else None
+
+
+def insurer_fields(insurer, fields):
+    """Maps combined-register field names onto `insurer`'s own column names (None stays None)."""
+    if fields is None:
+        return None
+    return [col for col in load_extractor(insurer).columns if COLUMN_ALIASES.get(col, col) in fields]
+
+
+def register_columns(fields=None):
+    """Combined register columns, narrowed to the extracted `fields` when given."""
+    return [col for col in COLUMNS if fields is None or col in BOOKKEEPING_COLUMNS or col in fields]
+
+
+def insurer_columns(insurer, fields=None):
+    """An insurer sheet's columns, narrowed to the extracted `fields` when given."""
+    wanted = insurer_fields(insurer, fields)
+    return [col for col in load_extractor(insurer).columns
+            if wanted is None or col in wanted or col in BOOKKEEPING_COLUMNS]
+
+
+def canonical(record, insurer):
+    """Maps an insurer record onto the combined register columns."""
+    row = {COLUMN_ALIASES.get(key, key): value for key, value in record.items()}
+    row["Insurer"] = insurer
+    row = {col: row.get(col, "N/A") for col in COLUMNS}
+    row[HASH_COLUMN] = row_hash(row)
+    return row
+
+
+def row_hash(row):
+    """
+    Short fingerprint of a register row's extracted values, stored alongside
+    it so a later append can tell changed rows without reading every column.
+    """
+    values = [str(row.get(col, "N/A")) for col in COLUMNS if col not in ("Duplicate Of", HASH_COLUMN)]
+    return hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()[:16]
+
+
+def layout_pages(insurer=None):
+    """Pages read with positions for `insurer` (all insurers' pages when unknown)."""
+    names = [insurer] if insurer else list(INSURERS)
+    return sorted({p for name in names for p in getattr(load_extractor(name), "LAYOUT_PAGES", ())})
+
+
+def read_text(file, insurer=None):
+    """Reads a PDF (path, file object or open PdfReader). Returns (text, layout)."""
+    from PyPDF2 import PdfReader
+
+    reader = file if isinstance(file, PdfReader) else PdfReader(file)
+    return extract_text_and_layout(reader, layout_pages(insurer))
+
+
+def extract_document(insurer, text, file_name, layout=None, fields=None):
+    """Runs `insurer`'s extractor; `fields` are combined-register names (None for all)."""
+    module = load_extractor(insurer)
+    with document(INSURERS[insurer]):
+        data = module.extract_policy_details(text, file_name, layout, insurer_fields(insurer, fields))
+    data["File Name"] = file_name
+    return data
+
+
+def extract_file(file, file_name, insurer=None, fields=None, archive=None):
+    """
+    Extracts one PDF, detecting the insurer from its text when `insurer` is
+    None. `file` may also be the PdfReader already opened by pre-flight.
+    The text and record are kept in `archive` (an archive.Archive) if given.
+    Returns (insurer, record); both are None for unrecognized documents.
+    """
+    text, layout = read_text(file, insurer)
+    insurer = insurer or detect_insurer(text)
+    if insurer is None:
+        return None, None
+    record = extract_document(insurer, text, file_name, layout, fields)
+    if archive is not None:
+        archive.add(file_name, insurer, text, layout, record)
+    return insurer, record
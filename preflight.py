@@ -0,0 +1,89 @@
+import re
+
+from PyPDF2 import PdfReader
+
+# --- Pre-flight triage ---
+# Cheap checks run before full text extraction so image-only scans, encrypted
+# or broken files and non-policy PDFs are set aside in milliseconds instead of
+# coming back as a row of "N/A" values.
+OK, NEEDS_OCR, REJECTED = "OK", "Needs OCR", "Rejected"
+
+HEADER_BYTES = 1024        # the PDF header must appear this early in the file
+MIN_TEXT_CHARS = 80        # non-space characters expected on a schedule's first page
+MAX_PAGES = 40             # policy schedules are a few pages long
+MAX_FORM_DEPTH = 4         # nesting of Form XObjects searched for fonts
+POLICY_WORDS = re.compile(r"polic|insur|premium|schedule|बीमा", re.IGNORECASE)
+
+
+class Triage:
+    def __init__(self, status, reason="", reader=None):
+        self.status = status
+        self.reason = reason
+        self.reader = reader
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def row(self, file_name):
+        return {"File Name": file_name, "Status": self.status, "Reason": self.reason}
+
+
+def _has_fonts(resources, depth=0):
+    """Whether `resources` (or the Form XObjects drawn with them) declare a font."""
+    resources = resources.get_object() if resources is not None else {}
+    if "/Font" in resources:
+        return True
+    if depth >= MAX_FORM_DEPTH:
+        return False
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    for xobject in xobjects.values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") == "/Form" and _has_fonts(xobject.get("/Resources"), depth + 1):
+            return True
+    return False
+
+
+def check(source):
+    """
+    Triage a PDF given as a path or binary file object. On success the opened
+    PdfReader is returned on the Triage so the file is not parsed twice.
+    """
+    if hasattr(source, "read"):
+        head = source.read(HEADER_BYTES)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            head = f.read(HEADER_BYTES)
+    if b"%PDF-" not in head:
+        return Triage(REJECTED, "not a PDF file")
+
+    try:
+        return _triage(PdfReader(source))
+    except Exception as e:
+        # Malformed files fail anywhere in PyPDF2 (a dangling font reference
+        # raises TypeError, a cyclic page tree RecursionError), so any error
+        # sets the file aside instead of ending the batch
+        return Triage(REJECTED, f"unreadable PDF ({type(e).__name__}: {e})")
+
+
+def _triage(reader):
+    if reader.is_encrypted and not reader.decrypt(""):
+        return Triage(REJECTED, "password protected")
+    pages = len(reader.pages)
+    if pages == 0:
+        return Triage(REJECTED, "no pages")
+    if pages > MAX_PAGES:
+        return Triage(REJECTED, f"{pages} pages, too long for a policy schedule")
+
+    first = reader.pages[0]
+    if not _has_fonts(first.get("/Resources")):
+        return Triage(NEEDS_OCR, "first page has no text (image-only scan)")
+    text = first.extract_text() or ""
+    chars = len(re.sub(r"\s+", "", text))
+    if chars < MIN_TEXT_CHARS:
+        return Triage(NEEDS_OCR, f"only {chars} text characters on the first page")
+    if not POLICY_WORDS.search(text):
+        return Triage(REJECTED, "no policy or insurance wording on the first page")
+    return Triage(OK, reader=reader)
@@ -0,0 +1,151 @@
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+
+from export import StreamingWorkbook
+from register import read_columns
+
+# --- Premium reconciliation ---
+# Register rows are joined to the lines of a payment statement (bank or
+# aggregator CSV) through hash indexes instead of a VLOOKUP per row: one on the
+# normalized policy number, one on the amount in paise. A register row whose
+# policy is on the statement is Matched when the amounts agree (within the
+# tolerance) and Mismatched otherwise; rows without a statement line are
+# Unmatched, with any unclaimed lines of the same amount suggested, and
+# statement lines no row claimed are listed too. Re-issued copies (rows with a
+# Duplicate Of) are left out, since a policy is paid once.
+POLICY_COLUMN = "Policy No"
+PREMIUM_COLUMN = "Premium Paid (Incl. GST)"
+REGISTER_COLUMNS = ["Insurer", POLICY_COLUMN, PREMIUM_COLUMN, "File Name", "Duplicate Of"]
+
+# Statement headers tried when the columns are not named explicitly
+STATEMENT_POLICY = r"polic"
+STATEMENT_AMOUNT = r"amount|premium|paid|credit"
+
+SHEETS = {
+    "Matched": REGISTER_COLUMNS[:4] + ["Statement Line", "Statement Policy", "Statement Amount"],
+    "Mismatched": REGISTER_COLUMNS[:4] + ["Statement Line", "Statement Policy", "Statement Amount", "Difference"],
+    "Unmatched Register": REGISTER_COLUMNS[:4] + ["Same Amount On Lines"],
+}
+MAX_SUGGESTIONS = 5
+
+
+def policy_key(value):
+    """Policy numbers compared without case, spaces, dashes or slashes."""
+    key = re.sub(r"[\s\-/]", "", str(value)).upper()
+    return None if key in ("", "N/A", "NA", "NAN") else key
+
+
+def amount_paise(value):
+    """'₹ 12,345.50', 'Rs.12345.5' or '12345.50 CR' -> 1234550; None if there is no amount."""
+    text = re.sub(r"(?i)rs\.?|inr|₹|,|\s|cr$|dr$", "", str(value))
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    try:
+        return int((Decimal(text) * 100).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def format_paise(paise):
+    return "N/A" if paise is None else f"{Decimal(paise) / 100:,.2f}"
+
+
+def _pick(header, pattern, given, what):
+    if given:
+        if given not in header:
+            raise ValueError(f"statement has no column {given!r}; columns: {', '.join(header)}")
+        return given
+    for col in header:
+        if re.search(pattern, col, re.I):
+            return col
+    raise ValueError(f"cannot tell which statement column holds the {what}; pass it explicitly")
+
+
+def load_statement(path, policy_column=None, amount_column=None):
+    """
+    Returns (lines, header, policy column, amount column); lines are dicts
+    of every statement column, as text.
+    """
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    header = list(frame.columns)
+    policy_column = _pick(header, STATEMENT_POLICY, policy_column, "policy number")
+    amount_column = _pick(header, STATEMENT_AMOUNT, amount_column, "amount")
+    return frame.to_dict("records"), header, policy_column, amount_column
+
+
+def load_register(source, name):
+    """The register's non-duplicate rows, with only the columns reconciliation needs."""
+    rows = []
+    for frame in read_columns(source, name, set(REGISTER_COLUMNS)):
+        for row in frame.to_dict("records"):
+            if row.get("Duplicate Of", "N/A") in ("", "N/A"):
+                rows.append(row)
+    return rows
+
+
+def reconcile(rows, lines, policy_column, amount_column, tolerance=0):
+    """
+    Joins register rows to statement lines. `tolerance` is in paise.
+    Returns {sheet name: [rows]}, including "Unmatched Statement" lines.
+    """
+    by_policy, by_amount = defaultdict(list), defaultdict(list)
+    amounts = []
+    for number, line in enumerate(lines):
+        paise = amount_paise(line[amount_column])
+        amounts.append(paise)
+        key = policy_key(line[policy_column])
+        if key is not None:
+            by_policy[key].append(number)
+        if paise is not None:
+            by_amount[paise].append(number)
+
+    # Statement line numbers as seen in a spreadsheet (the header is line 1)
+    def line_no(number):
+        return number + 2
+
+    report = {name: [] for name in SHEETS}
+    used, unmatched = set(), []
+    for row in rows:
+        paise = amount_paise(row.get(PREMIUM_COLUMN, "N/A"))
+        candidates = [n for n in by_policy.get(policy_key(row.get(POLICY_COLUMN, "N/A")), ()) if n not in used]
+        if not candidates:
+            unmatched.append((row, paise))
+            continue
+        # Several lines for one policy: take the closest amount
+        number = min(candidates, key=lambda n: abs(amounts[n] - paise)
+                     if paise is not None and amounts[n] is not None else float("inf"))
+        used.add(number)
+        result = dict(row, **{
+            "Statement Line": line_no(number),
+            "Statement Policy": lines[number][policy_column],
+            "Statement Amount": format_paise(amounts[number]),
+        })
+        if paise is not None and amounts[number] is not None and abs(amounts[number] - paise) <= tolerance:
+            report["Matched"].append(result)
+        else:
+            known = paise is not None and amounts[number] is not None
+            result["Difference"] = format_paise(amounts[number] - paise) if known else "N/A"
+            report["Mismatched"].append(result)
+
+    # Suggestions come from lines no policy claimed (e.g. a mistyped number)
+    for row, paise in unmatched:
+        same = [line_no(n) for n in by_amount.get(paise, ()) if n not in used]
+        row["Same Amount On Lines"] = ", ".join(map(str, same[:MAX_SUGGESTIONS])) or "N/A"
+        report["Unmatched Register"].append(row)
+    report["Unmatched Statement"] = [
+        dict(line, **{"Statement Line": line_no(number)})
+        for number, line in enumerate(lines) if number not in used
+    ]
+    return report
+
+
+def write_report(path, report, statement_columns):
+    with StreamingWorkbook(path) as book:
+        columns = dict(SHEETS, **{"Unmatched Statement": ["Statement Line"] + list(statement_columns)})
+        for name, sheet_columns in columns.items():
+            book.add_sheet(name, sheet_columns)
+            for row in report[name]:
+                book.write(name, row)
@@ -0,0 +1,113 @@
+import csv
+import io
+import os
+
+import pandas as pd
+
+from export import COMBINED_SHEET, StreamingWorkbook
+from pipeline import COLUMNS, HASH_COLUMN
+
+# --- Incremental append to a master register ---
+# Only the key columns (and the stored row hash) of the existing register are
+# read to build a lookup index; new extractions are compared against it and
+# only new or changed rows are written out. Changed rows are appended again,
+# so the last row for a key is the current one.
+KEY_COLUMNS = ["Policy No", "File Name"]
+
+
+def row_key(row):
+    return (str(row.get("Policy No", "N/A")).strip(), str(row.get("File Name", "")).strip())
+
+
+def is_csv(name):
+    return str(name).lower().endswith(".csv")
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_header(source, name):
+    """Returns the register's column names without reading its rows."""
+    _rewind(source)
+    if is_csv(name):
+        header = list(pd.read_csv(source, nrows=0).columns)
+    else:
+        header = list(pd.read_excel(source, sheet_name=0, nrows=0).columns)
+    _rewind(source)
+    return header
+
+
+def read_columns(source, name, wanted):
+    """
+    Reads only the `wanted` columns of a register (CSV, or the combined
+    sheet(s) of an .xlsx register) as text. Returns one frame per sheet.
+    """
+    options = dict(usecols=lambda col: col in wanted, dtype=str, keep_default_na=False)
+    _rewind(source)
+    if is_csv(name):
+        frames = [pd.read_csv(source, **options)]
+    else:
+        sheets = pd.ExcelFile(source).sheet_names
+        parts = [s for s in sheets if s.startswith(COMBINED_SHEET)] or sheets[:1]
+        frames = [pd.read_excel(source, sheet_name=part, **options) for part in parts]
+    _rewind(source)
+    return frames
+
+
+def load_index(source, name):
+    """
+    Builds {(Policy No, File Name): row hash} from an existing register (CSV,
+    or the combined sheet(s) of an .xlsx register), reading only key columns.
+    The hash is None for registers written before rows carried one.
+    """
+    index = {}
+    for frame in read_columns(source, name, set(KEY_COLUMNS) | {HASH_COLUMN}):
+        hashes = frame[HASH_COLUMN] if HASH_COLUMN in frame else [None] * len(frame)
+        for policy, file_name, digest in zip(frame.get("Policy No", [""] * len(frame)),
+                                             frame.get("File Name", [""] * len(frame)), hashes):
+            index[(policy.strip(), file_name.strip())] = digest or None
+    return index
+
+
+def new_or_changed(rows, index):
+    """Splits combined-register rows into (new, changed) against `index`."""
+    new, changed = [], []
+    for row in rows:
+        key = row_key(row)
+        if key not in index:
+            new.append(row)
+        elif index[key] is not None and index[key] != row[HASH_COLUMN]:
+            changed.append(row)
+    return new, changed
+
+
+# --- Writers ---
+def csv_rows(rows, header):
+    """Formats rows as CSV text (no header) in the register's column order."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row in rows:
+        writer.writerow([row.get(col, "N/A") for col in header])
+    return out.getvalue()
+
+
+def append_csv(path, rows):
+    """Appends rows to a CSV register in place, in its existing column order."""
+    header = read_header(path, path)
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b"\n", b"\r"):
+                f.write(b"\n")
+        f.write(csv_rows(rows, header).encode("utf-8"))
+
+
+def write_additions(path, rows, header=None):
+    """Writes the new/changed rows to a workbook shaped like the register's combined sheet."""
+    with StreamingWorkbook(path) as book:
+        book.add_sheet(COMBINED_SHEET, header or COLUMNS)
+        for row in rows:
+            book.write(COMBINED_SHEET, row)
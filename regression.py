@@ -0,0 +1,334 @@
+import argparse
+import ast
+import importlib
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import pattern_stats
+import pipeline
+from cli import iter_pdfs
+
+# --- Differential regression harness ---
+# Every engine extracts the same decoded text of each file in a golden corpus.
+# Candidates are compared field by field with the baseline engine (and with
+# expected records when a golden directory is given), and timed. Only golden
+# records decide pass or fail: the run fails when a candidate gets wrong a
+# field the baseline got right. Values that merely differ from the baseline
+# (intended fixes included) are listed as changed, without failing the run.
+IGNORED_FIELDS = ("File Name", "Duplicate Of")
+
+
+@contextmanager
+def optimizations(enabled):
+    """Switches learned pattern order on or off."""
+    saved = pattern_stats.ENABLED
+    pattern_stats.ENABLED = enabled
+    try:
+        yield
+    finally:
+        pattern_stats.ENABLED = saved
+
+
+# --- The original extractors ---
+# The legacy engine runs each insurer module as first committed (or as of
+# --legacy-rev), read from git: its imports, functions and constants are run
+# without the Streamlit page code around them. Every later change -- learned
+# state, text normalization and label indexes, layout lookups, field guards --
+# is then measured against the code it replaced.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LEGACY_REV = None      # None for the repository's first commit
+_legacy = {}
+
+
+def _git(*args):
+    return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def legacy_rev():
+    return LEGACY_REV or _git("rev-list", "--max-parents=0", "HEAD").split()[-1]
+
+
+def _uses_streamlit(node):
+    return any(isinstance(n, ast.Name) and n.id == "st" for n in ast.walk(node))
+
+
+def _extraction_code(source, path):
+    """Compiles a module's imports (but Streamlit), functions and assignments not involving `st`."""
+    tree = ast.parse(source, path)
+    kept = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            node.names = [alias for alias in node.names if alias.name.split(".")[0] != "streamlit"]
+            if node.names:
+                kept.append(node)
+        elif isinstance(node, ast.ImportFrom):
+            if (node.module or "").split(".")[0] != "streamlit":
+                kept.append(node)
+        elif isinstance(node, ast.FunctionDef) or (isinstance(node, ast.Assign) and not _uses_streamlit(node)):
+            kept.append(node)
+    tree.body = kept
+    return compile(tree, path, "exec")
+
+
+def legacy_module(insurer):
+    """The namespace of `insurer`'s module at LEGACY_REV."""
+    module_name = pipeline.INSURERS[insurer]
+    if module_name not in _legacy:
+        path = f"{legacy_rev()}:{module_name}.py"
+        namespace = {"__name__": f"legacy_{module_name}"}
+        exec(_extraction_code(_git("show", path), path), namespace)
+        _legacy[module_name] = namespace
+    return _legacy[module_name]
+
+
+# --- Engines ---
+# An engine takes (text, layout, insurer, file_name) and returns a record.
+def legacy(text, layout, insurer, file_name):
+    """The insurer modules as first committed (see legacy_module)."""
+    extract = legacy_module(insurer)["extract_policy_details"]
+    if len(inspect.signature(extract).parameters) > 1:
+        return extract(text, file_name)
+    return extract(text)
+
+
+def plain(text, layout, insurer, file_name):
+    """The current extractors with learned pattern order off."""
+    with optimizations(False):
+        return pipeline.extract_document(insurer, text, file_name, layout)
+
+
+def optimized(text, layout, insurer, file_name):
+    with optimizations(True):
+        return pipeline.extract_document(insurer, text, file_name, layout)
+
+
+def vectorized(text, layout, insurer, file_name):
+    """
+    Column-wise batch extraction (vectorized.py) over a batch of one: checks
+    its values only. It is a fast path for FIELD_PATTERNS subsets of large
+    batches, so its timings here are not its speed.
+    """
+    from vectorized import extract_batch
+
+    with optimizations(True):
+        return extract_batch(insurer, [text], [file_name], [layout]).iloc[0].to_dict()
+
+
+ENGINES = {"legacy": legacy, "plain": plain, "optimized": optimized, "vectorized": vectorized}
+
+
+def load_engine(spec):
+    """An engine by name, or any function given as "module:function"."""
+    if spec in ENGINES:
+        return ENGINES[spec]
+    module, _, function = spec.partition(":")
+    if not function:
+        raise ValueError(f"unknown engine {spec!r} (expected one of {', '.join(ENGINES)} or module:function)")
+    return getattr(importlib.import_module(module), function)
+
+
+# --- Golden records ---
+def golden_path(golden, path):
+    return os.path.join(golden, os.path.splitext(os.path.basename(path))[0] + ".json")
+
+
+def load_golden(golden, path):
+    try:
+        with open(golden_path(golden, path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compared_fields(*records):
+    fields = []
+    for record in records:
+        for field in record or {}:
+            if field not in IGNORED_FIELDS and field not in fields:
+                fields.append(field)
+    return fields
+
+
+def _value(record, field):
+    return str((record or {}).get(field, "N/A")).strip()
+
+
+# --- Run ---
+def learned_state():
+    return pattern_stats.snapshot()
+
+
+def restore_learned(state):
+    pattern_stats.restore(state)
+
+
+def run_engine(engine, text, layout, insurer, file_name, repeat, learned):
+    """
+    Returns (record or None, best time in seconds, error message, learned
+    state after the first run). Every run starts from `learned`, the state
+    before this file, so no run is timed with an order learned from the file.
+    """
+    best, record, after = float("inf"), None, learned
+    for run in range(repeat):
+        restore_learned(learned)
+        start = time.perf_counter()
+        try:
+            record = engine(text, layout, insurer, file_name)
+        except Exception as e:
+            return None, time.perf_counter() - start, f"{type(e).__name__}: {e}", learned
+        best = min(best, time.perf_counter() - start)
+        if run == 0:
+            after = learned_state()
+    return record, best, "", after
+
+
+def compare(paths, engines, golden=None, repeat=3, update_golden=False, log=print):
+    """
+    Runs `engines` ({name: engine}, baseline first) over the PDFs in `paths`.
+    Returns a report dict with per-file results, the values changed vs the
+    baseline ("mismatches") and the regressions against golden records.
+    """
+    names = list(engines)
+    baseline = names[0]
+    report = {"files": [], "mismatches": [], "regressions": [], "errors": [], "skipped": []}
+
+    for path in iter_pdfs(paths):
+        file_name = os.path.basename(path)
+        try:
+            text, layout = pipeline.read_text(path)
+        except Exception as e:
+            report["errors"].append({"file": path, "engine": "read", "error": f"{type(e).__name__}: {e}"})
+            log(f"{'-':<15} {file_name}: unreadable ({type(e).__name__})")
+            continue
+        insurer = pipeline.detect_insurer(text)
+        if insurer is None:
+            report["skipped"].append(path)
+            continue
+
+        records, times = {}, {}
+        learned = learned_state()
+        for name in names:
+            record, seconds, error, after = run_engine(engines[name], text, layout, insurer, file_name, repeat, learned)
+            records[name], times[name] = record, seconds
+            if error:
+                report["errors"].append({"file": path, "engine": name, "error": error})
+        # Later files see what the last engine learned from this one
+        restore_learned(after)
+
+        if golden and update_golden and records[baseline] is not None:
+            os.makedirs(golden, exist_ok=True)
+            with open(golden_path(golden, path), "w", encoding="utf-8") as f:
+                json.dump(records[baseline], f, ensure_ascii=False, indent=1)
+        expected = load_golden(golden, path) if golden else None
+
+        fields = compared_fields(expected, *records.values())
+        correct = {}
+        for name in names:
+            if expected is not None and records[name] is not None:
+                correct[name] = sum(_value(records[name], f) == _value(expected, f) for f in fields)
+            if name == baseline:
+                continue
+            for field in fields:
+                base, got = _value(records[baseline], field), _value(records[name], field)
+                entry = {"file": path, "insurer": insurer, "engine": name, "field": field, "baseline": base, "value": got}
+                if expected is not None:
+                    want = _value(expected, field)
+                    entry["expected"] = want
+                    if base == want and got != want:
+                        report["regressions"].append(entry)
+                if base != got:
+                    report["mismatches"].append(entry)
+
+        report["files"].append({
+            "file": path, "insurer": insurer, "fields": len(fields), "seconds": times,
+            "correct": correct if expected is not None else None,
+        })
+        speed = ", ".join(
+            f"{name} {times[name] * 1000:.2f}ms (x{times[baseline] / times[name]:.1f})"
+            for name in names if times[name]
+        )
+        log(f"{insurer:<15} {file_name}: {speed}")
+    return report
+
+
+# --- Summary ---
+def summarize(report, names, log=print):
+    baseline = names[0]
+    by_insurer = {}
+    for entry in report["files"]:
+        by_insurer.setdefault(entry["insurer"], []).append(entry)
+
+    log("")
+    log(f"{'insurer':<15} {'files':>5}  " + "  ".join(f"{name + ' ms':>14} {'speedup':>7} {'accuracy':>8}" for name in names))
+    rows = sorted(by_insurer.items())
+    if len(rows) > 1:
+        rows.append(("all", report["files"]))
+    for insurer, entries in rows:
+        cells = []
+        for name in names:
+            ms = statistics.median(e["seconds"][name] for e in entries) * 1000
+            speedup = statistics.median(e["seconds"][baseline] / e["seconds"][name] for e in entries if e["seconds"][name])
+            scored = [e for e in entries if e["correct"] and name in e["correct"]]
+            accuracy = (f"{sum(e['correct'][name] for e in scored) / sum(e['fields'] for e in scored):.1%}"
+                        if scored else "-")
+            cells.append(f"{ms:>14.2f} {speedup:>7.1f} {accuracy:>8}")
+        log(f"{insurer:<15} {len(entries):>5}  " + "  ".join(cells))
+
+    for label, title in (("mismatches", f"Changed vs {baseline}"), ("regressions", "Regressions against golden records")):
+        counts = {}
+        for entry in report[label]:
+            key = (entry["insurer"], entry["engine"], entry["field"])
+            counts[key] = counts.get(key, 0) + 1
+        if counts:
+            log(f"\n{title} by field:")
+            for (insurer, engine, field), count in sorted(counts.items()):
+                log(f"  {insurer} / {engine} / {field}: {count}")
+    for error in report["errors"]:
+        log(f"\nError in {error['engine']} on {error['file']}: {error['error']}")
+    if report["skipped"]:
+        log(f"\nUnrecognized ({len(report['skipped'])}): {', '.join(report['skipped'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare extraction engines field by field over a golden corpus.")
+    parser.add_argument("paths", nargs="+", help="PDF files or directories")
+    parser.add_argument("--baseline", default="legacy", help="reference engine (default: legacy, the extractors as first committed)")
+    parser.add_argument("--legacy-rev", metavar="REV", help="git revision the legacy engine reads the extractors from (default: the first commit)")
+    parser.add_argument("--engine", action="append", dest="engines", metavar="ENGINE",
+                        help="candidate engine: a name or module:function (default: optimized); repeatable")
+    parser.add_argument("--golden", metavar="DIR", help="directory of expected <pdf name>.json records")
+    parser.add_argument("--update-golden", action="store_true", help="write the baseline's records to --golden")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs per file and engine (fastest is kept)")
+    parser.add_argument("--json", metavar="OUT", help="also write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    names = [args.baseline] + [name for name in (args.engines or ["optimized"]) if name != args.baseline]
+    if "legacy" in names:
+        global LEGACY_REV
+        try:
+            LEGACY_REV = _git("rev-parse", "--verify", args.legacy_rev or legacy_rev()).strip()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Cannot read the legacy extractors from git: {getattr(e, 'stderr', '') or e}", file=sys.stderr)
+            return 2
+    engines = {name: load_engine(name) for name in names}
+    report = compare(args.paths, engines, args.golden, args.repeat, args.update_golden)
+    summarize(report, names)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    failed = report["regressions"] or report["errors"]
+    print(f"\n{'FAIL' if failed else 'OK'}: {len(report['regressions'])} regression(s), "
+          f"{len(report['errors'])} error(s); {len(report['mismatches'])} value(s) changed vs {names[0]}"
+          + ("" if args.golden else " (no --golden records to judge them)"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
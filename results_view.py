@@ -0,0 +1,101 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+# --- Paginated results view ---
+# The extracted frame stays in session state on the server; filters, sorting
+# and paging run in a fragment, so changing them reruns only this view (not
+# the extraction) and only the visible page is sent to the browser.
+PAGE_SIZES = [25, 50, 100, 250, 500]
+MISSING = ["N/A", ""]
+NA_SORT = "N/A fields"
+NOT_COUNTED = ("File Name", "Duplicate Of", "Row Hash")
+
+
+def parse_dates(values):
+    """Parses the insurers' mixed date formats (day first); unparseable values become NaT."""
+    cleaned = values.astype(str).str.replace("'", " ", regex=False).str.strip()
+    iso = pd.to_datetime(cleaned, format="%Y-%m-%d", errors="coerce")
+    return iso.fillna(pd.to_datetime(cleaned, format="mixed", dayfirst=True, errors="coerce"))
+
+
+def prepare(df):
+    """Frame plus the per-row helper columns used for filtering and sorting."""
+    frame = df.reset_index(drop=True).fillna("N/A")
+    counted = [col for col in frame.columns if col not in NOT_COUNTED]
+    return {
+        "frame": frame,
+        "na": frame[counted].isin(MISSING).sum(axis=1),
+        "expiry": parse_dates(frame["Expiry Date"]) if "Expiry Date" in frame else pd.Series(pd.NaT, index=frame.index),
+    }
+
+
+def _filter_mask(key, frame, na, expiry):
+    mask = pd.Series(True, index=frame.index)
+    left, right = st.columns(2)
+
+    if "Insurer" in frame:
+        insurers = left.multiselect("Insurer", sorted(frame["Insurer"].unique()), key=f"{key}_insurer")
+        if insurers:
+            mask &= frame["Insurer"].isin(insurers)
+
+    policy = right.text_input("Policy No contains", key=f"{key}_policy")
+    if policy and "Policy No" in frame:
+        mask &= frame["Policy No"].astype(str).str.contains(policy.strip(), case=False, regex=False)
+
+    if expiry.notna().any():
+        first, last = expiry.min().date(), expiry.max().date()
+        chosen = left.date_input("Expiry between", (first, last), min_value=first, max_value=last, key=f"{key}_expiry")
+        if len(chosen) == 2 and tuple(chosen) != (first, last):
+            mask &= expiry.between(pd.Timestamp(chosen[0]), pd.Timestamp(chosen[1]))
+
+    most = int(na.max()) if len(na) else 0
+    if most:
+        at_least = right.slider("At least this many N/A fields", 0, most, 0, key=f"{key}_na")
+        if at_least:
+            mask &= na >= at_least
+    return mask
+
+
+@st.fragment
+def _results_page(key):
+    data = st.session_state[key]
+    frame, na, expiry = data["frame"], data["na"], data["expiry"]
+    mask = _filter_mask(key, frame, na, expiry)
+
+    left, middle, right = st.columns([2, 1, 1])
+    sort_by = left.selectbox("Sort by", ["(upload order)", NA_SORT] + list(frame.columns), key=f"{key}_sort")
+    descending = middle.toggle("Descending", key=f"{key}_desc")
+    size = right.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+
+    if sort_by == NA_SORT:
+        values = na[mask]
+    elif sort_by == "Expiry Date":
+        values = expiry[mask]
+    elif sort_by in frame:
+        values = frame.loc[mask, sort_by]
+    else:
+        values = None
+    if values is None:
+        order = frame.index[mask]
+    else:
+        order = values.sort_values(ascending=not descending, kind="stable", na_position="last").index
+
+    pages = max(1, math.ceil(len(order) / size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    start = (page - 1) * size
+    rows = order[start:start + size]
+    st.dataframe(frame.loc[rows])
+    shown = f"Rows {start + 1}–{start + len(rows)}" if len(rows) else "No rows"
+    st.caption(f"{shown} of {len(order)} matching ({len(frame)} extracted).")
+
+
+def show_results(df, key="results"):
+    """Shows `df` as a filterable, sortable, paginated table."""
+    st.session_state[key] = prepare(df)
+    _results_page(key)
@@ -0,0 +1,160 @@
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cli import extract_path, hash_files, iter_pdfs, register_results
+from dedupe import batch_id
+from pattern_stats import save_stats
+from store import remove_stale, write_json
+
+# --- Sharded batch processing ---
+# plan:  hash the inputs and write a manifest to a shared directory, assigning
+#        each file to a shard by its content hash.
+# work:  any number of worker processes, on any machine that can see the shared
+#        directory and the input paths, claim unfinished shards by creating a
+#        lock file exclusively, extract them and write the shard's results.
+# merge: read the shard results back in manifest order and write one register,
+#        so the output does not depend on which worker handled which shard.
+# Shard results are written atomically and their presence marks a shard done.
+# If two workers ever process the same shard (a live worker outlasting the
+# stale-lock timeout) they write the same values: each process has its own
+# learned pattern statistics, but those only change how fast a value is found,
+# not which (learned order applies only to exclusive fallback chains). Workers
+# sharing a state directory merge their learned state into it on save, so none
+# drops another's.
+MANIFEST = "manifest.json"
+
+
+def shard_of(digest, shards):
+    return int(digest, 16) % shards
+
+
+def _shard_path(shared, shard, suffix):
+    return os.path.join(shared, f"shard-{shard:04d}{suffix}")
+
+
+def load_manifest(shared):
+    with open(os.path.join(shared, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def plan(paths, shared, shards, fields=None):
+    """
+    Writes the manifest for `paths` into `shared`, with the field subset
+    every worker extracts (None for all). Returns the manifest.
+    """
+    if shards < 1:
+        raise ValueError("need at least one shard")
+    manifest_path = os.path.join(shared, MANIFEST)
+    if os.path.exists(manifest_path):
+        raise FileExistsError(f"{shared} already has a manifest; use a new directory per batch")
+    files, skipped = hash_files(iter_pdfs(paths))
+    manifest = {
+        "shards": shards,
+        "fields": fields,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "skipped": [os.path.abspath(path) for path in skipped],
+        "files": [
+            {"path": os.path.abspath(path), "digest": digest, "shard": shard_of(digest, shards)}
+            for path, digest in files
+        ],
+    }
+    write_json(manifest_path, manifest)
+    return manifest
+
+
+def claim(shared, shard, stale_after=None):
+    """
+    Claims a shard by creating its lock file exclusively. A lock older than
+    `stale_after` seconds (a crashed worker) is taken over; of several
+    workers taking it over, one claims the shard (see store.remove_stale).
+    """
+    lock = _shard_path(shared, shard, ".lock")
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if stale_after is None or not remove_stale(lock, stale_after):
+            return False
+        return claim(shared, shard)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{socket.gethostname()} {os.getpid()}\n")
+    return True
+
+
+def work(shared, insurer=None, stale_after=None, log=print):
+    """Processes unclaimed shards until none are left. Returns the shards done."""
+    manifest = load_manifest(shared)
+    shards = manifest["shards"]
+    done = []
+    # Workers start at different shards so they rarely contend for a lock
+    start = os.getpid() % shards
+    for shard in [(start + i) % shards for i in range(shards)]:
+        result_path = _shard_path(shared, shard, ".json")
+        if os.path.exists(result_path) or not claim(shared, shard, stale_after):
+            continue
+        results = []
+        for entry in manifest["files"]:
+            if entry["shard"] != shard:
+                continue
+            status, reason, found, data = extract_path(entry["path"], insurer, manifest.get("fields"))
+            results.append({"digest": entry["digest"], "status": status, "reason": reason, "insurer": found, "record": data})
+        write_json(result_path, {"worker": f"{socket.gethostname()}:{os.getpid()}", "results": results})
+        save_stats()
+        done.append(shard)
+        log(f"Shard {shard}: {len(results)} file(s) processed")
+    return done
+
+
+def work_parallel(shared, processes, insurer=None, stale_after=None):
+    """Runs `processes` local workers on the shared directory."""
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(work, shared, insurer, stale_after) for _ in range(processes)]
+        return sorted(shard for future in futures for shard in future.result())
+
+
+def progress(shared):
+    """Returns {"done": [...], "claimed": [...], "pending": [...]} shard numbers."""
+    state = {"done": [], "claimed": [], "pending": []}
+    for shard in range(load_manifest(shared)["shards"]):
+        if os.path.exists(_shard_path(shared, shard, ".json")):
+            state["done"].append(shard)
+        elif os.path.exists(_shard_path(shared, shard, ".lock")):
+            state["claimed"].append(shard)
+        else:
+            state["pending"].append(shard)
+    return state
+
+
+def merge(shared, report, partial=False):
+    """
+    Yields (insurer, record, combined row) for the whole batch in manifest
+    order, noting skipped and failed files in `report`. Raises if shards are
+    unfinished, unless `partial` (their files are then reported as pending).
+    """
+    manifest = load_manifest(shared)
+    pending = [shard for shard in range(manifest["shards"]) if not os.path.exists(_shard_path(shared, shard, ".json"))]
+    if pending and not partial:
+        raise RuntimeError(f"shard(s) not finished: {', '.join(map(str, pending))}")
+
+    results = {}
+    for shard in range(manifest["shards"]):
+        if shard in pending:
+            continue
+        with open(_shard_path(shared, shard, ".json"), "r", encoding="utf-8") as f:
+            for result in json.load(f)["results"]:
+                results[result["digest"]] = result
+
+    report["Skipped identical"].extend(manifest["skipped"])
+    report.setdefault("Pending", [])
+
+    def outcomes():
+        for entry in manifest["files"]:
+            result = results.get(entry["digest"])
+            if result is None:
+                report["Pending"].append(entry["path"])
+                continue
+            yield (entry["path"], entry["digest"], result["status"], result["reason"], result["insurer"], result["record"])
+
+    return register_results(outcomes(), batch_id(entry["digest"] for entry in manifest["files"]), report)
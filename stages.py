@@ -0,0 +1,128 @@
+import io
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+from cli import extract_path
+from pattern_stats import save_stats
+
+# --- Staged export ---
+# read:            a thread reads each file's bytes, in register order
+# decode+extract:  a process pool triages, parses and extracts the documents
+#                  (parsed PDFs do not pickle, so decoding and extraction stay
+#                  together in the worker that parsed the file)
+# write:           the caller consumes the outcomes in register order, e.g.
+#                  register_results feeding the workbook writer
+# The queues between the stages are bounded, so at most `depth` files are read
+# ahead and at most `depth` documents are in flight; a slow writer stalls the
+# readers instead of buffering the whole batch in memory.
+_DONE = object()
+
+
+def _init_worker():
+    # Pool workers keep their own learned state; save it when the worker exits
+    Finalize(None, _save_state, exitpriority=10)
+
+
+def _save_state():
+    save_stats()
+
+
+def _extract_bytes(path, data, insurer, fields, archive):
+    return extract_path(path, insurer, fields, source=io.BytesIO(data), archive=archive)
+
+
+def _put(q, item, stop):
+    """Puts `item` on a bounded queue unless the pipeline is stopped. Returns False if it was."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    """Gets the next item from a queue, or _DONE once the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+def _read(files, read_q, stop):
+    for path, digest in files:
+        try:
+            with open(path, "rb") as f:
+                item = (path, digest, f.read(), None)
+        except OSError as e:
+            item = (path, digest, None, e)
+        if not _put(read_q, item, stop):
+            return
+    _put(read_q, _DONE, stop)
+
+
+def _submit(pool, read_q, pending_q, insurer, fields, archive, stop):
+    while True:
+        item = _get(read_q, stop)
+        if item is _DONE:
+            break
+        path, digest, data, error = item
+        try:
+            future = None if error else pool.submit(_extract_bytes, path, data, insurer, fields, archive)
+        except RuntimeError:
+            # The pool is shut down: the consumer has stopped
+            return
+        if not _put(pending_q, (path, digest, future, error), stop):
+            return
+    _put(pending_q, _DONE, stop)
+
+
+def staged_outcomes(files, insurer=None, fields=None, workers=None, depth=None, archive=None):
+    """
+    Extracts each (path, digest) with the read, decode/extract and consumer
+    stages running concurrently. Yields (path, digest, status, reason,
+    insurer, record) in the order of `files`, like cli.extract_all's outcomes.
+    """
+    workers = workers or os.cpu_count() or 1
+    depth = depth or 2 * workers
+    read_q, pending_q = queue.Queue(depth), queue.Queue(depth)
+    stop = threading.Event()
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        threads = [
+            threading.Thread(target=_read, args=(files, read_q, stop), daemon=True),
+            threading.Thread(target=_submit, args=(pool, read_q, pending_q, insurer, fields, archive, stop), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = pending_q.get()
+                if item is _DONE:
+                    break
+                path, digest, future, error = item
+                if future is not None:
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = ("Failed", str(e), None, None)
+                else:
+                    outcome = ("Failed", str(error), None, None)
+                yield (path, digest) + outcome
+        finally:
+            # Also reached when the consumer stops early: unblock and drop the rest
+            stop.set()
+            for q in (read_q, pending_q):
+                while True:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        break
+            pool.shutdown(cancel_futures=True)
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,114 @@
+import json
+import os
+import socket
+import tempfile
+import time
+from contextlib import contextmanager
+
+# --- Where learned state lives (pattern statistics, template caches, indexes) ---
+STATE_DIR = os.environ.get(
+    "EXTRACTOR_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".extractor_state"),
+)
+
+
+def state_path(name):
+    return os.path.join(STATE_DIR, name)
+
+
+# --- JSON helpers ---
+def load_json(name, default=None):
+    """
+    Loads a JSON state file from STATE_DIR. Returns `default` (or an empty
+    dict) if the file is missing or unreadable.
+    """
+    try:
+        with open(state_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def write_json(path, data):
+    """
+    Writes a JSON file atomically, so a crash or a concurrent reader never
+    sees a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_json(name, data):
+    """Writes a JSON state file in STATE_DIR atomically."""
+    write_json(state_path(name), data)
+
+
+# --- Lock files ---
+def _age(path):
+    try:
+        return time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+
+def remove_stale(path, stale_after):
+    """
+    Removes lock file `path` if it is older than `stale_after` seconds (left
+    by a crashed process). Returns whether it did; the caller then creates its
+    own lock exclusively, so at most one of several processes gets it.
+
+    The lock is first renamed to a name of this process's own, which only one
+    process can do, and removed only if what was renamed is still stale: a
+    fresh lock another process created in between is put back instead.
+    """
+    age = _age(path)
+    if age is None or age < stale_after:
+        return False
+    taken = f"{path}.{socket.gethostname()}.{os.getpid()}"
+    try:
+        os.rename(path, taken)
+    except FileNotFoundError:
+        return False
+    age = _age(taken)
+    if age is not None and age >= stale_after:
+        os.remove(taken)
+        return True
+    try:
+        os.link(taken, path)   # unlike rename, never replaces a lock created since
+    except OSError:
+        pass
+    os.remove(taken)
+    return False
+
+
+@contextmanager
+def locked(name, timeout=10.0):
+    """
+    Holds a lock file next to state file `name` while it is read, merged and
+    written, so processes saving the same file do not drop each other's
+    updates. A lock older than `timeout` seconds (left by a crashed process)
+    is taken over (see remove_stale).
+    """
+    path = state_path(name + ".lock")
+    os.makedirs(STATE_DIR, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if not remove_stale(path, timeout):
+                time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
@@ -0,0 +1,97 @@
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+
+# --- Template fingerprinting ---
+# Policies printed from the same insurer template have nearly the same text
+# layout. A document is fingerprinted from the order in which well-known labels
+# appear in its first FINGERPRINT_CHARS characters, so pattern statistics (see
+# pattern_stats) can be kept per template. The fingerprint is only computed
+# when a statistic needs it.
+#
+# Learned field windows (searching first where a pattern matched on earlier
+# documents of the template) were dropped: a window hit is the document's first
+# match only if nothing matches before it, and checking that rescans the text a
+# plain search would have scanned, so windows could not beat re.search.
+FINGERPRINT_CHARS = 2000   # leading characters scanned for labels
+MAX_LABELS = 60            # labels used for the fingerprint
+
+LABELS = {
+    "policy no": r"Policy\s*(?:No\.?|Number)",
+    "period": r"Period\s*of\s*Insurance|Policy\s*Period|Policy\s*Effective\s*from",
+    "insured name": r"(?:Insured|Customer|Policyholder)\s*Name",
+    "customer id": r"(?:Customer|Client)\s*ID",
+    "chassis": r"Chassis\s*(?:No\.?|Number)",
+    "engine": r"Engine\s*(?:No\.?|Number|or\s*M\/c)",
+    "registration": r"Registration\s*(?:No\.?|Number)|Regn\.?\s*(?:No\.?|Number)",
+    "make": r"Make\s*(?:\/|and|of)",
+    "fuel": r"Fuel\s*Type|Type\s*of\s*Fuel",
+    "idv": r"Vehicle\s*IDV|Sum\s*Insured|Total\s*Value",
+    "premium": r"Total\s*Premium|Gross\s*Premium|Premium\s*Paid|Total\s*Amount",
+    "intermediary": r"Intermediary\s*(?:Name|Code)|Agent\s*Name",
+    "payment": r"Payment\s*Mode|Mode\s*of\s*Payment",
+    "nominee": r"Nominee",
+    "gstin": r"GSTIN",
+    "cubic capacity": r"Cubic\s*Capacity",
+    "seating": r"Seating\s*Capacity",
+    "manufacture": r"Year\s*of\s*Manufacture|Mfg\.?\s*Year",
+    "class of vehicle": r"Class\s*of\s*Vehicle",
+    "email": r"E[\-\s]*Mail",
+    "mobile": r"Mobile\s*No|Contact\s*(?:No|number)",
+}
+# Labels are searched one by one in the lower-cased text: each then has a
+# literal prefix re can scan for, which one case-insensitive alternation lacks.
+_LABEL_RES = [(name, re.compile(pattern.lower())) for name, pattern in LABELS.items()]
+
+_local = threading.local()
+_compiled = {}
+
+
+def fingerprint(insurer, text):
+    """Returns a template id derived from the sequence of labels near the start of `text`."""
+    head = text[:FINGERPRINT_CHARS].lower()
+    found = sorted((m.start(), name) for name, label in _LABEL_RES for m in label.finditer(head))
+    sequence = [name for _, name in found[:MAX_LABELS]]
+    digest = hashlib.sha1(" > ".join(sequence).encode("utf-8")).hexdigest()[:12]
+    return f"{insurer}:{digest}"
+
+
+class _Document:
+    def __init__(self, insurer):
+        self.insurer = insurer
+        self.template = None
+
+
+@contextmanager
+def document(insurer):
+    """Marks the extraction of one document, for current_template."""
+    doc = _Document(insurer)
+    previous = getattr(_local, "doc", None)
+    _local.doc = doc
+    try:
+        yield doc
+    finally:
+        _local.doc = previous
+
+
+def current_template(text=None):
+    """
+    Returns the template id of the document being extracted, if any; it is
+    fingerprinted from the first `text` passed in.
+    """
+    doc = getattr(_local, "doc", None)
+    if doc is None:
+        return None
+    if doc.template is None and text is not None:
+        doc.template = fingerprint(doc.insurer, text)
+    return doc.template
+
+
+def search(pattern, text, flags=0):
+    """`re.search`, with compiled patterns kept in a plain dict instead of re's cache."""
+    key = (pattern, int(flags))
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _compiled[key] = re.compile(pattern, flags)
+    return compiled.search(text)
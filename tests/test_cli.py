@@ -0,0 +1,62 @@
+import csv
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from loadtest import policy_lines, text_pdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Command-line smoke tests ---
+# The CLI runs in a subprocess with a scratch state directory, so learned
+# state from earlier runs (or the developer's own) does not leak in.
+def run_cli(tmp_path, *args):
+    env = dict(os.environ, EXTRACTOR_STATE_DIR=str(tmp_path / "state"))
+    return subprocess.run([sys.executable, os.path.join(ROOT, "cli.py"), *map(str, args)],
+                          cwd=tmp_path, env=env, capture_output=True, text=True)
+
+
+def write_pdfs(directory, count, seed=0):
+    rng = random.Random(seed)
+    directory.mkdir(exist_ok=True)
+    for n in range(count):
+        (directory / f"{n:03d}.pdf").write_bytes(text_pdf(policy_lines("Tata AIG", rng)))
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def register_csv(tmp_path):
+    """A CSV register of two exported policies (the combined sheet of an export)."""
+    import pandas as pd
+
+    write_pdfs(tmp_path / "corpus", 2)
+    result = run_cli(tmp_path, "export", tmp_path / "corpus", "-o", tmp_path / "first.xlsx")
+    assert result.returncode == 0, result.stderr
+    path = tmp_path / "register.csv"
+    pd.read_excel(tmp_path / "first.xlsx", sheet_name="All Policies", dtype=str).to_csv(path, index=False)
+    return path
+
+
+def test_export_append_adds_only_new_rows(tmp_path, register_csv):
+    write_pdfs(tmp_path / "corpus", 3)
+    result = run_cli(tmp_path, "export", tmp_path / "corpus", "--append", register_csv)
+    assert result.returncode == 0, result.stderr
+    assert "Appended 1 new and 0 changed rows" in result.stdout
+    assert [row["File Name"] for row in read_rows(register_csv)] == ["000.pdf", "001.pdf", "002.pdf"]
+
+
+def test_export_append_to_workbook_writes_additions(tmp_path, register_csv):
+    write_pdfs(tmp_path / "corpus", 3)
+    result = run_cli(tmp_path, "export", tmp_path / "corpus", "--append", tmp_path / "first.xlsx",
+                     "-o", tmp_path / "additions.xlsx")
+    assert result.returncode == 0, result.stderr
+    assert "Wrote 1 new and 0 changed rows" in result.stdout
+    assert (tmp_path / "additions.xlsx").exists()
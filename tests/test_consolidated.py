@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+import store
+from cache import EXTRACTIONS
+from loadtest import Upload, policy_lines, text_pdf
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STATE_DIR", str(tmp_path))
+    EXTRACTIONS.clear()
+    yield
+    EXTRACTIONS.clear()
+
+
+def test_cache_hit_keeps_the_uploaded_file_name():
+    import consolidated
+
+    data = text_pdf(policy_lines("Tata AIG", random.Random(0)))
+    consolidated.process_upload([Upload("alice_upload.pdf", data)])
+    result = consolidated.process_upload([Upload("bob_renamed.pdf", data)])
+    assert [row["File Name"] for row in result["rows"]] == ["bob_renamed.pdf"]
@@ -0,0 +1,34 @@
+import pytest
+
+import store
+from dedupe import DuplicateIndex, batch_id
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STATE_DIR", str(tmp_path))
+
+
+def record(policy, chassis="MA123"):
+    return {"Policy No": policy, "CHASSIS NUM": chassis}
+
+
+def test_same_file_in_a_larger_batch_is_not_its_own_duplicate():
+    first = DuplicateIndex()
+    for name, digest in [("000.pdf", "a"), ("001.pdf", "b")]:
+        assert first.register(record(name), name, digest, batch_id("ab")) == ""
+    first.save()
+
+    again = DuplicateIndex()
+    flags = [again.register(record(name), name, digest, batch_id("abc"))
+             for name, digest in [("000.pdf", "a"), ("001.pdf", "b"), ("002.pdf", "c")]]
+    assert flags == ["", "", ""]
+    assert again.seen_file("a", batch_id("abc")) == "000.pdf"
+
+
+def test_reissued_copy_is_flagged():
+    index = DuplicateIndex()
+    assert index.register(record("P1"), "original.pdf", "a", "batch") == ""
+    assert index.register(record("P1"), "reissue.pdf", "b", "batch") == "original.pdf"
+    # Different bytes under the same name are a replaced file, not a copy
+    assert index.register(record("P1"), "original.pdf", "c", "later") == ""
@@ -0,0 +1,48 @@
+import pytest
+
+import pattern_stats
+import store
+from pattern_stats import find_first
+
+PRODUCT = [
+    r"Product\s*Name\s*[:\-]?\s*(.*?)(?=\s*Sum)",
+    r"(Goods\s+Carrying\s+Vehicle\s+Policy)",
+    r"([A-Za-z\s\-]+(?:Policy|Plan))",
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(pattern_stats, "_stats", None)
+    monkeypatch.setattr(pattern_stats, "_pending", {})
+
+
+def test_specific_to_generic_chain_keeps_its_order():
+    for _ in range(pattern_stats.MIN_SAMPLES + 1):
+        find_first("royal", "Product Name", PRODUCT, "Private Car Package Policy", template="t")
+    text = "Certificate of Goods Carrying Vehicle Policy"
+    assert find_first("royal", "Product Name", PRODUCT, text, template="t") == "Goods Carrying Vehicle Policy"
+
+
+def test_non_exclusive_chain_is_not_counted():
+    find_first("royal", "Product Name", PRODUCT, "Private Car Package Policy", template="t")
+    assert pattern_stats._pending == {}
+
+
+def test_exclusive_chain_tries_the_dominant_alternative_first(monkeypatch):
+    chain = [r"Mode\s*of\s*Payment\s*:\s*(\w+)", r"Payment\s*Mode\s*:\s*(\w+)"]
+    for _ in range(pattern_stats.MIN_SAMPLES):
+        find_first("royal", "Payment Mode", chain, "Payment Mode: Online", template="t", exclusive=True)
+    tried = []
+    monkeypatch.setattr(pattern_stats.templates, "search", lambda p, text, flags: tried.append(p))
+    find_first("royal", "Payment Mode", chain, "Payment Mode: Online", template="t", exclusive=True)
+    assert tried[0] == chain[1]
+
+
+def test_save_keeps_counts_saved_by_other_processes():
+    find_first("tata", "Fuel Type", [r"Fuel\s*:\s*(\w+)"], "Fuel: Petrol", template="t", exclusive=True)
+    # Another worker saves its counts after this process loaded the file
+    store.save_json(pattern_stats.STATS_FILE, {"tata/t": {"Fuel Type": {r"Fuel\s*:\s*(\w+)": 3}}})
+    pattern_stats.save_stats()
+    assert store.load_json(pattern_stats.STATS_FILE)["tata/t"]["Fuel Type"][r"Fuel\s*:\s*(\w+)"] == 4
@@ -0,0 +1,57 @@
+import io
+
+import preflight
+
+TEXT = b"(Policy Schedule - National Insurance Company Limited - Total premium payable 12,345.00 including GST for the private car package policy) Tj"
+
+
+def pdf(objects):
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return io.BytesIO(out)
+
+
+def stream(head, content):
+    return b"<< %s /Length %d >>\nstream\n" % (head, len(content)) + content + b"\nendstream"
+
+
+def test_text_drawn_in_a_form_xobject_is_not_sent_to_ocr():
+    text = b"BT /F1 10 Tf 40 760 Td " + TEXT + b" ET"
+    source = pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /XObject << /X1 5 0 R >> >> >>",
+        stream(b"", b"/X1 Do"),
+        stream(b"/Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Font << /F1 6 0 R >> >>", text),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ])
+    assert preflight.check(source).status == preflight.OK
+
+
+def test_page_without_fonts_needs_ocr():
+    source = pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << >> >>",
+        stream(b"", b"0 0 m 10 10 l S"),
+    ])
+    assert preflight.check(source).status == preflight.NEEDS_OCR
+
+
+def test_dangling_font_reference_is_rejected_not_raised():
+    source = pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 9 0 R >> >> >>",
+        stream(b"", b"BT /F1 10 Tf 40 760 Td " + TEXT + b" ET"),
+    ])
+    triage = preflight.check(source)
+    assert triage.status == preflight.REJECTED and triage.reason.startswith("unreadable PDF")
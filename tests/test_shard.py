@@ -0,0 +1,24 @@
+import os
+
+import shard
+import store
+
+
+def test_stale_lock_is_claimed_by_one_worker(tmp_path):
+    lock = tmp_path / "shard-0000.lock"
+    lock.write_text("crashed 1\n")
+    os.utime(lock, (0, 0))
+    assert shard.claim(str(tmp_path), 0, stale_after=60)
+    # A second worker that also saw the stale lock now finds the new claim
+    assert not shard.claim(str(tmp_path), 0, stale_after=60)
+
+
+def test_fresh_lock_renamed_by_a_late_taker_is_put_back(tmp_path, monkeypatch):
+    lock = tmp_path / "shard-0000.lock"
+    lock.write_text("worker 2\n")
+    # Stale when first looked at, then replaced by another worker's fresh claim
+    ages = iter([3600, 0])
+    monkeypatch.setattr(store, "_age", lambda path: next(ages))
+    assert not store.remove_stale(str(lock), 60)
+    assert lock.read_text() == "worker 2\n"
+    assert os.listdir(tmp_path) == ["shard-0000.lock"]
@@ -0,0 +1,27 @@
+import re
+
+import templates
+from templates import current_template, document, fingerprint, search
+
+MOBILE = r"\b[6-9]\d{9}\b"
+
+
+def test_fingerprint_reads_only_the_leading_text():
+    head = "Policy No: 1 Chassis No: ABC Engine No: 123 "
+    tail = "Nominee: X " * 50
+    padding = " " * templates.FINGERPRINT_CHARS
+    assert fingerprint("tata", head + padding + tail) == fingerprint("tata", head + padding)
+    assert fingerprint("tata", head) != fingerprint("tata", "Chassis No: ABC " + head)
+
+
+def test_current_template_is_fingerprinted_once_per_document():
+    assert current_template("Policy No: 1") is None
+    with document("tata"):
+        first = current_template("Policy No: 1 Chassis No: ABC")
+        assert current_template("Nominee: X") == first == fingerprint("tata", "Policy No: 1 Chassis No: ABC")
+
+
+def test_search_matches_re_search():
+    text = "Policy No: 2 Tel 9123456789 Mobile No: 9876500000"
+    assert search(MOBILE, text).group() == re.search(MOBILE, text).group() == "9123456789"
+    assert search(MOBILE, "no number", re.IGNORECASE) is None
@@ -0,0 +1,70 @@
+import re
+
+import pandas as pd
+
+import pipeline
+from templates import document
+
+# --- Column-wise batch extraction ---
+# A fast path for field subsets. A batch of one insurer's documents is handled
+# as a Series of texts, and each of the module's FIELD_PATTERNS (single-pattern
+# fields) is applied to the whole Series with str.extract: the pattern is
+# compiled once and there is no per-document extractor call, though str.extract
+# still matches document by document in Python. The remaining fields
+# (fallbacks, cleanup, layout lookups) come from the module's
+# extract_policy_details, called per document for just those fields, so once
+# any of them is asked for the batch costs about as much as the per-document
+# loop. On synthetic batches, a FIELD_PATTERNS-only subset ran 4-6x faster
+# than the loop; all fields ran no faster. Modules that prepare their text with
+# more than whitespace collapsing expose it as `normalize(text)`.
+FLAGS = re.IGNORECASE | re.DOTALL
+
+
+def normalize(module, texts):
+    """The texts as the module's extractor sees them (`t` in extract_policy_details)."""
+    if hasattr(module, "normalize"):
+        return texts.map(module.normalize)
+    return texts.str.replace(r"\s+", " ", regex=True)
+
+
+def extract_batch(insurer, texts, file_names=None, layouts=None, fields=None):
+    """
+    Extracts a batch of one insurer's documents. `texts`, `file_names` and
+    `layouts` are parallel sequences (layouts may be None); `fields` are
+    combined-register names as for pipeline.extract_document. Returns a
+    DataFrame with the module's columns, one row per document, in order.
+    Faster than the per-document loop only when `fields` are all in the
+    module's FIELD_PATTERNS.
+    """
+    module = pipeline.load_extractor(insurer)
+    # Object dtype keeps Python `re` semantics (lookaheads) for str.extract
+    texts = pd.Series(list(texts), dtype=object)
+    file_names = list(file_names) if file_names is not None else [None] * len(texts)
+    layouts = list(layouts) if layouts is not None else [None] * len(texts)
+    wanted = pipeline.insurer_fields(insurer, fields)
+    columns = [col for col in module.columns if col not in ("File Name", "Duplicate Of")]
+    if wanted is not None:
+        columns = [col for col in columns if col in wanted]
+
+    patterns = getattr(module, "FIELD_PATTERNS", {})
+    frame = pd.DataFrame(index=texts.index)
+    simple = [col for col in columns if col in patterns]
+    if simple and len(texts):
+        normalized = normalize(module, texts)
+        for col in simple:
+            values = normalized.str.extract(patterns[col], flags=FLAGS, expand=False)
+            frame[col] = values.str.strip().fillna("N/A").astype(object)
+
+    rest = [col for col in columns if col not in patterns]
+    if rest:
+        records = []
+        for text, name, layout in zip(texts, file_names, layouts):
+            with document(pipeline.INSURERS[insurer]):
+                records.append(module.extract_policy_details(text, name, layout, rest))
+        for col in rest:
+            frame[col] = [record[col] for record in records]
+
+    frame = frame.reindex(columns=columns)
+    if "File Name" in module.columns:
+        frame["File Name"] = file_names
+    return frame
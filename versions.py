@@ -0,0 +1,149 @@
+import ast
+import hashlib
+import importlib
+import os
+import threading
+
+import pipeline
+from cache import SHARED_MODULES
+
+# --- Field-level rule versions ---
+# A field's version is a hash of the code that computes it, so a pattern fix
+# changes the version of just the fields it touches. In each insurer module's
+# extract_policy_details, statements guarded by `wanted` (`if "X" in wanted:`,
+# `... if "X" in wanted else ...`) and entries of a dict keyed by column name
+# belong to the fields they name; the FIELD_PATTERNS entry belongs to its
+# field. Everything else -- unguarded statements, the module's helpers and
+# constants, the shared extraction modules -- is common to every field, and so
+# is each field's list of dependencies and their versions. Versions compare
+# the syntax tree, so comment and formatting edits do not change them; the
+# Streamlit page (main) is left out.
+BOOKKEEPING = ("File Name", "Duplicate Of")
+
+_trees = {}
+_versions = {}
+_lock = threading.Lock()
+
+
+def _stamp(name):
+    path = importlib.import_module(name).__file__
+    return path, os.path.getmtime(path)
+
+
+def _tree(name):
+    """The parsed source of module `name`, cached by file and modification time."""
+    stamp = _stamp(name)
+    path = stamp[0]
+    with _lock:
+        tree = _trees.get(stamp)
+    if tree is None:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        with _lock:
+            _trees[stamp] = tree
+    return tree
+
+
+def _digest(*parts):
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def _mentions_wanted(node):
+    return any(isinstance(n, ast.Name) and n.id == "wanted" and isinstance(n.ctx, ast.Load) for n in ast.walk(node))
+
+
+def _named_fields(node, columns):
+    return {n.value for n in ast.walk(node) if isinstance(n, ast.Constant) and n.value in columns}
+
+
+def _guard(stmt):
+    """The test guarding a statement on the requested fields, or None."""
+    if isinstance(stmt, ast.If) and _mentions_wanted(stmt.test):
+        return stmt.test
+    if isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.IfExp) and _mentions_wanted(stmt.value.test):
+        return stmt.value.test
+    return None
+
+
+def _field_dict(stmt, columns):
+    """The {column: expression} of an assignment of a dict keyed by column names, or None."""
+    if not (isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Dict) and stmt.value.keys):
+        return None
+    keys = stmt.value.keys
+    if not all(isinstance(k, ast.Constant) and k.value in columns for k in keys):
+        return None
+    return dict(zip((k.value for k in keys), stmt.value.values))
+
+
+def _is_field_patterns(stmt):
+    return isinstance(stmt, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "FIELD_PATTERNS" for t in stmt.targets)
+
+
+def rule_parts(module_name, columns):
+    """Returns (common code, {field: [code, ...]}) as ast dumps."""
+    common, parts = [], {col: [] for col in columns}
+    for node in _tree(module_name).body:
+        if isinstance(node, ast.FunctionDef) and node.name == "main":
+            continue
+        if isinstance(node, ast.If) and "__name__" in ast.dump(node.test):
+            continue
+        if _is_field_patterns(node):
+            for col, pattern in (_field_dict(node, columns) or {}).items():
+                parts[col].append(ast.dump(pattern))
+            continue
+        if not (isinstance(node, ast.FunctionDef) and node.name == "extract_policy_details"):
+            common.append(ast.dump(node))
+            continue
+        common.append(ast.dump(node.args))
+        for stmt in node.body:
+            guard, entries = _guard(stmt), _field_dict(stmt, columns)
+            owners = _named_fields(guard, columns) if guard is not None else set()
+            if owners:
+                for col in owners:
+                    parts[col].append(ast.dump(stmt))
+            elif entries:
+                for col, value in entries.items():
+                    parts[col].append(ast.dump(value))
+            else:
+                common.append(ast.dump(stmt))
+    return common, parts
+
+
+def field_versions(insurer):
+    """{column: version} for every extracted column of `insurer`'s module."""
+    module_name = pipeline.INSURERS[insurer]
+    stamps = tuple(_stamp(name) for name in (module_name,) + SHARED_MODULES)
+    with _lock:
+        cached = _versions.get(stamps)
+    if cached is None:
+        cached = _field_versions(insurer, module_name)
+        with _lock:
+            _versions[stamps] = cached
+    return dict(cached)
+
+
+def _field_versions(insurer, module_name):
+    module = pipeline.load_extractor(insurer)
+    columns = [col for col in module.columns if col not in BOOKKEEPING]
+    dependencies = getattr(module, "FIELD_DEPENDENCIES", {})
+    common, parts = rule_parts(module_name, columns)
+    shared = [ast.dump(_tree(name)) for name in SHARED_MODULES]
+    base = _digest(*shared, *common)
+
+    versions = {}
+
+    def version(col, seen=()):
+        if col not in versions:
+            deps = [dep for dep in dependencies.get(col, ()) if dep not in seen]
+            versions[col] = _digest(base, col, *parts[col], *(f"{dep}={version(dep, seen + (col,))}" for dep in deps))
+        return versions[col]
+
+    for col in columns:
+        version(col)
+    return versions
+
+
+def changed_fields(insurer, stored):
+    """The fields in `stored` ({field: version}) whose rule has changed since."""
+    current = field_versions(insurer)
+    return [field for field, version in stored.items() if field in current and current[field] != version]